@@ -1,12 +1,100 @@
-from app.repositories.queue_repository import QueueRepository
+import asyncio
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.repositories.outbox_repository import add_messages
+from app.repositories.queue_publisher import get_queue_publisher
+from app.services.courses_service import get_roster_cache, invalidate_course_users
+from app.services.user_service import (
+    get_user_info_cache,
+    get_token_cache,
+    get_token_validation_counts,
+)
 from app.schemas.notification_schemas import (
     UserNotificationEvent,
     CourseNotificationEvent,
+    NotificationEvent,
 )
+from typing import Any, Dict, List
+import logging
+
+
+def _can_use_outbox(error: HTTPException) -> bool:
+    # Solo si el broker no esta disponible, no si el mensaje es invalido
+    return (
+        settings.OUTBOX_ENABLED
+        and error.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
 
+async def _save_to_outbox(db: Session, messages: List[Dict[str, Any]]):
+    logging.warning("RabbitMQ no disponible, los mensajes se guardan en el outbox")
+    await asyncio.to_thread(add_messages, db, messages)
 
-def handle_add_queue_message(
+
+async def handle_add_queue_message(
     notification: UserNotificationEvent | CourseNotificationEvent,
+    db: Session,
+):
+    message = notification.model_dump(exclude_none=True)
+    queue_publisher = get_queue_publisher()
+    try:
+        return await queue_publisher.send_message(message)
+    except HTTPException as e:
+        if not _can_use_outbox(e):
+            raise
+        await _save_to_outbox(db, [message])
+        return True
+
+
+async def handle_add_queue_messages(
+    notifications: List[NotificationEvent], db: Session
 ):
-    queue_repo = QueueRepository()
-    return queue_repo.send_message(notification.model_dump(exclude_none=True))
+    messages = [
+        notification.model_dump(exclude_none=True) for notification in notifications
+    ]
+    queue_publisher = get_queue_publisher()
+    try:
+        errors = await queue_publisher.send_batch(messages)
+    except HTTPException as e:
+        if not _can_use_outbox(e):
+            raise
+        errors = [e] * len(messages)
+
+    # Los mensajes rechazados por falta de broker se aceptan via outbox
+    outbox_indexes = [
+        index
+        for index, error in enumerate(errors)
+        if error is not None and _can_use_outbox(error)
+    ]
+    if outbox_indexes:
+        await _save_to_outbox(db, [messages[index] for index in outbox_indexes])
+        for index in outbox_indexes:
+            errors[index] = None
+
+    results = []
+    for index, error in enumerate(errors):
+        if error is None:
+            results.append({"index": index, "success": True})
+        else:
+            results.append({"index": index, "success": False, "detail": error.detail})
+    return results
+
+
+async def handle_invalidate_course_users(course_id: str):
+    # Se descarta en este proceso y se avisa a los workers de todos los procesos
+    invalidate_course_users(course_id)
+    await get_queue_publisher().broadcast(
+        settings.RABBITMQ_INVALIDATION_EXCHANGE, course_id.encode()
+    )
+
+
+def handle_get_cache_metrics() -> Dict[str, Any]:
+    return {
+        "course_roster": get_roster_cache().stats(),
+        "user_info": get_user_info_cache().stats(),
+        "user_tokens": {
+            **get_token_cache().stats(),
+            "validations": dict(get_token_validation_counts()),
+        },
+    }
@@ -1,10 +1,11 @@
+import asyncio
 import os
-import httpx
 import logging
 from typing import Optional
 from functools import lru_cache
 from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.http_clients import get_auth_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,8 @@ class ServiceAuth:
     def __init__(self):
         self.base_url = settings.AUTH_SERVICE_URL
         self.access_token: Optional[str] = None
+        # Un solo login a la vez: los 401 concurrentes comparten la renovacion
+        self._login_lock = asyncio.Lock()
         self.service_username = os.getenv("SERVICE_USERNAME")
         self.service_password = os.getenv("SERVICE_PASSWORD")
         if not self.service_username:
@@ -30,36 +33,51 @@ class ServiceAuth:
             await self.login()
 
     async def login(self) -> Optional[str]:
+        async with self._login_lock:
+            return await self._request_token()
+
+    async def renew_token(self, rejected_token: Optional[str]) -> Optional[str]:
+        """
+        Renueva el token que el auth service rechazo con un 401. Si mientras se
+        esperaba el lock otro request ya lo renovo, se usa ese token sin volver
+        a autenticar.
+        """
+        async with self._login_lock:
+            if self.access_token is not None and self.access_token != rejected_token:
+                return self.access_token
+            return await self._request_token()
+
+    async def _request_token(self) -> Optional[str]:
         try:
-            async with httpx.AsyncClient() as client:
-                logger.info("Intentando autenticar servicio...")
-                logger.debug(f"URL: {self.base_url}/token/service")
-                logger.debug(f"Username: {self.service_username}")
-
-                response = await client.post(
-                    f"{self.base_url}/token/service",
-                    data={
-                        "username": self.service_username,
-                        "password": self.service_password,
-                    },
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                )
+            client = get_auth_client()
+            logger.info("Intentando autenticar servicio...")
+            logger.debug(f"URL: {self.base_url}/token/service")
+            logger.debug(f"Username: {self.service_username}")
 
-                logger.debug(
-                    f"Respuesta del servicio: Status={response.status_code}, Body={response.text}"
-                )
+            response = await client.post(
+                f"{self.base_url}/token/service",
+                data={
+                    "username": self.service_username,
+                    "password": self.service_password,
+                },
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+
+            logger.debug(
+                f"Respuesta del servicio: Status={response.status_code}, Body={response.text}"
+            )
 
-                if response.status_code == 200:
-                    self.access_token = response.json()["access_token"]
-                    logger.info("Servicio autenticado exitosamente")
-                    return self.access_token
-                else:
-                    logger.error(
-                        f"Error en la autenticación del servicio. Status: {response.status_code}"
-                    )
-                    logger.error(f"URL: {self.base_url}/token/service")
-                    logger.error(f"Detalle del error: {response.text}")
-                    return None
+            if response.status_code == 200:
+                self.access_token = response.json()["access_token"]
+                logger.info("Servicio autenticado exitosamente")
+                return self.access_token
+            else:
+                logger.error(
+                    f"Error en la autenticación del servicio. Status: {response.status_code}"
+                )
+                logger.error(f"URL: {self.base_url}/token/service")
+                logger.error(f"Detalle del error: {response.text}")
+                return None
 
         except Exception as e:
             logger.error(f"Error al intentar autenticar el servicio: {str(e)}")
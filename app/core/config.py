@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal
 import logging
 
 # Configurar logging
@@ -32,8 +33,90 @@ class Settings(BaseSettings):
     APP_PASSWORD: str
 
     # RabbitMQ
+    # "memory" usa colas en memoria, sin broker: solo para correr todo en un proceso
+    QUEUE_BACKEND: Literal["amqp", "memory"] = "amqp"
     RABBITMQ_HOST: str = "rabbitmq"
     RABBITMQ_QUEUE: str
+    RABBITMQ_BULK_QUEUE: str = "notification_bulk"
+    # Exchange fanout por el que todos los procesos worker reciben las
+    # invalidaciones de sus caches en memoria
+    RABBITMQ_INVALIDATION_EXCHANGE: str = "notification_invalidations"
+    # Porción del prefetch y la concurrencia del worker que recibe cada cola
+    TRANSACTIONAL_QUEUE_WEIGHT: int = 3
+    BULK_QUEUE_WEIGHT: int = 1
+    RABBITMQ_PREFETCH_COUNT: int = 20
+    WORKER_CONCURRENCY: int = 10
+    ACK_BATCH_SIZE: int = 10
+    ACK_BATCH_INTERVAL: float = 0.5  # segundos
+    # Si es False el servidor web no consume, lo hacen los procesos de `entrypoint.sh worker`
+    EMBEDDED_WORKER: bool = True
+    WORKER_PROCESSES: int = 2
+    # Reintentos con backoff exponencial via colas de espera con TTL
+    RETRY_MAX_ATTEMPTS: int = 5
+    RETRY_BASE_DELAY_MS: int = 5000
+    # Canales con publisher confirms que comparten los endpoints /notify
+    RABBITMQ_PUBLISHER_CHANNELS: int = 4
+    # Tiempo maximo que un request espera para publicar antes de responder 503
+    RABBITMQ_PUBLISH_TIMEOUT: float = 2.0  # segundos
+    # Si RabbitMQ no esta disponible los mensajes se guardan en la tabla de outbox
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_RELAY_INTERVAL: float = 1.0  # segundos
+    OUTBOX_BATCH_SIZE: int = 500
+    # Destinatarios de una notificacion de curso que se procesan a la vez y
+    # threads del pool de envios del fan-out (uno por proceso). Cada envio usa
+    # conexiones de DB, mantenerlo por debajo del pool
+    COURSE_FANOUT_CONCURRENCY: int = 10
+    # Los cursos con mas destinatarios se dividen en bloques de este tamaño que
+    # se vuelven a encolar para que los tome cualquier worker
+    COURSE_CHUNK_SIZE: int = 200
+    # Un worker toma cada bloque antes de enviarlo y renueva la toma mientras lo
+    # procesa; si no se renueva en este tiempo (el worker se cayo) otra copia
+    # del bloque la puede retomar
+    COURSE_CHUNK_CLAIM_TIMEOUT: float = 60  # segundos
+    # Las marcas de bloques procesados se borran al pasar la ventana completa
+    # de reintentos mas este margen; el relay las limpia cada
+    # PROCESSED_CHUNK_PURGE_INTERVAL y cada proceso worker al arrancar
+    PROCESSED_CHUNK_RETENTION: float = 86400  # segundos
+    PROCESSED_CHUNK_PURGE_INTERVAL: float = 3600  # segundos
+    # Segundos que se reutiliza el listado de inscriptos de un curso (0 = sin cache)
+    COURSE_ROSTER_CACHE_TTL: float = 300
+    # Endpoint paginado opcional del courses service para cursos muy grandes
+    # (GET {COURSES_SERVICE_URL}{path}?offset=0&limit=N -> lista de user_id).
+    # Puede incluir {course_id}, por ejemplo /courses/{course_id}/users
+    COURSES_USERS_PAGE_PATH: str | None = None
+    # Endpoint opcional del auth service para pedir varios usuarios a la vez
+    # (GET {AUTH_SERVICE_URL}{path}?ids=1,2,3 -> lista de usuarios). Sin el, la
+    # informacion se pide de a un usuario con hasta USER_INFO_CONCURRENCY en curso
+    AUTH_USERS_BATCH_PATH: str | None = None
+    USER_INFO_CHUNK_SIZE: int = 100
+    USER_INFO_CONCURRENCY: int = 10
+    # Cache de nombre y email de los usuarios (LRU con vencimiento). Los usuarios
+    # inexistentes se recuerdan por menos tiempo
+    USER_INFO_CACHE_TTL: float = 600
+    USER_INFO_CACHE_SIZE: int = 10000
+    USER_INFO_NEGATIVE_CACHE_TTL: float = 60
+    # Cada worker registra en el log las metricas de sus caches cada tantos
+    # segundos (0 = no se registran); /metrics/cache solo ve las del servidor web
+    CACHE_STATS_LOG_INTERVAL: float = 60
+    # Cache de tokens de usuario ya validados, guardados por su hash. Cada entrada
+    # vence con el token (claim exp) o a los TOKEN_CACHE_MAX_TTL segundos
+    TOKEN_CACHE_MAX_TTL: float = 300
+    TOKEN_CACHE_SIZE: int = 10000
+    # JWKS opcional del auth service (GET {AUTH_SERVICE_URL}{path}). Si esta
+    # configurado los JWT se verifican localmente con las claves cacheadas y solo
+    # se consulta /me/ cuando el token no se puede verificar asi
+    AUTH_JWKS_PATH: str | None = None
+    AUTH_JWKS_CACHE_TTL: float = 3600
+    AUTH_JWT_ALGORITHMS: list[str] = ["RS256"]
+    # Claim del JWT con el id del usuario
+    AUTH_JWT_USER_ID_CLAIM: str = "sub"
+
+    # Clientes HTTP compartidos con el auth y el courses service (uno por servicio)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30  # segundos
+    HTTP_TIMEOUT: float = 5.0  # segundos
+    HTTP_HTTP2: bool = False
 
     AUTH_SERVICE_URL: str
     COURSES_SERVICE_URL: str
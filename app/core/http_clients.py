@@ -0,0 +1,46 @@
+import httpx
+import logging
+from functools import lru_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=settings.HTTP_TIMEOUT,
+        http2=settings.HTTP_HTTP2,
+    )
+
+
+# Un cliente por servicio, compartido por los routers y el worker del proceso,
+# para reutilizar las conexiones keep-alive. Se crean en el lifespan (o al
+# arrancar el worker) y se cierran con close_http_clients.
+@lru_cache()
+def get_auth_client() -> httpx.AsyncClient:
+    return _create_client()
+
+
+@lru_cache()
+def get_courses_client() -> httpx.AsyncClient:
+    return _create_client()
+
+
+def open_http_clients():
+    get_auth_client()
+    get_courses_client()
+    logger.info("Clientes HTTP de los servicios creados")
+
+
+async def close_http_clients():
+    """Cierra las conexiones abiertas; el proximo uso crea clientes nuevos"""
+    for get_client in (get_auth_client, get_courses_client):
+        if get_client.cache_info().currsize:
+            await get_client().aclose()
+        get_client.cache_clear()
+    logger.info("Clientes HTTP de los servicios cerrados")
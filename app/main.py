@@ -1,20 +1,27 @@
 from contextlib import asynccontextmanager
-import threading
+import asyncio
 from fastapi import FastAPI, HTTPException, Request
 from app.utils.problem_details import problem_detail_response
 from app.core.auth import get_service_auth
+from app.core.http_clients import open_http_clients, close_http_clients
+from app.repositories.queue_publisher import get_queue_publisher
 from app.db.base import Base
 from app.db.session import engine
 import logging
 import traceback
-from app.workers.notification_worker import worker_main
+from app.workers.notification_worker import NotificationWorker
+from app.workers.outbox_relay import OutboxRelay
+from app.services.notification_processor import shutdown_fanout_executor
 from app.routers.notification_router import router as notification_router
 from app.core.config import settings
 
-logging.getLogger("pika").setLevel(logging.INFO)
+logging.getLogger("aio_pika").setLevel(logging.INFO)
+logging.getLogger("aiormq").setLevel(logging.INFO)
 logging.getLogger("httpcore").setLevel(logging.INFO)
 
-worker_thread: threading.Thread | None = None
+notification_worker: NotificationWorker | None = None
+worker_task: asyncio.Task | None = None
+outbox_relay: OutboxRelay | None = None
 
 if settings.ENVIRONMENT != "test":
     # Crear todas las tablas al iniciar la aplicación
@@ -25,24 +32,66 @@ if settings.ENVIRONMENT != "test":
         logging.error(f"Error al crear tablas en la base de datos: {str(e)}")
         logging.error(traceback.format_exc())
 
-    try:
-        if worker_thread is None or not worker_thread.is_alive():
-            worker_thread = threading.Thread(target=worker_main, daemon=True)
-            worker_thread.start()
-            logging.info("Worker thread started")
-    except Exception as e:
-        logging.error(f"Error starting worker thread: {str(e)}")
-        logging.error(traceback.format_exc())
+
+def on_worker_started(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logging.error(f"Error starting worker: {str(task.exception())}")
+
+
+def start_worker():
+    """Arranca el consumidor en el event loop de la aplicación sin bloquear el inicio"""
+    global notification_worker, worker_task
+    notification_worker = NotificationWorker()
+    worker_task = asyncio.create_task(notification_worker.start())
+    worker_task.add_done_callback(on_worker_started)
+    logging.info("Worker started")
+
+
+async def stop_worker():
+    global notification_worker, worker_task
+    if worker_task and not worker_task.done():
+        worker_task.cancel()
+    if notification_worker:
+        await notification_worker.stop()
+    notification_worker = None
+    worker_task = None
+
+
+def worker_failed() -> bool:
+    return (
+        worker_task is not None
+        and worker_task.done()
+        and (worker_task.cancelled() or worker_task.exception() is not None)
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Inicializa los servicios necesarios al arrancar la aplicación"""
+    global outbox_relay
     if settings.ENVIRONMENT != "test":
+        open_http_clients()
         service_auth = get_service_auth()
         await service_auth.initialize()
         logging.info("Servicio de autenticación inicializado")
+        try:
+            await get_queue_publisher().connect()
+        except Exception:
+            logging.warning("Publicador de RabbitMQ no disponible al iniciar")
+            get_queue_publisher().start_reconnecting()
+        if settings.OUTBOX_ENABLED:
+            outbox_relay = OutboxRelay()
+            outbox_relay.start()
+        if settings.EMBEDDED_WORKER:
+            start_worker()
     yield
+    await stop_worker()
+    if outbox_relay:
+        await outbox_relay.stop()
+        outbox_relay = None
+    await get_queue_publisher().close()
+    await close_http_clients()
+    shutdown_fanout_executor()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -88,14 +137,15 @@ app.include_router(notification_router)
 
 
 @app.get("/health")
-def get_health():
-    global worker_thread
-    if worker_thread is None or not worker_thread.is_alive():
-        logging.warning("Worker thread not alive. Restarting...")
+async def get_health():
+    # Si EMBEDDED_WORKER es False los consumidores corren en procesos aparte
+    # (entrypoint.sh worker) y no hay nada que revisar acá
+    if worker_failed():
+        logging.warning("Worker not running. Restarting...")
         try:
-            worker_thread = threading.Thread(target=worker_main, daemon=True)
-            worker_thread.start()
-            logging.info("Worker thread restarted from /health")
+            await stop_worker()
+            start_worker()
+            logging.info("Worker restarted from /health")
         except Exception as e:
             logging.error(f"Failed to restart worker: {e}")
             return {"status": "worker restart failed"}
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class OutboxMessage(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    payload = Column(Text, nullable=False)  # Mensaje serializado en JSON
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ProcessedChunk(Base):
+    __tablename__ = "processed_course_chunks"
+
+    chunk_id = Column(String, primary_key=True)
+
+    # Momento en que un worker tomo el bloque; lo renueva mientras lo procesa
+    claimed_at = Column(DateTime(timezone=True), nullable=False)
+    # Se completa al terminar de notificar a todos los destinatarios del bloque
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
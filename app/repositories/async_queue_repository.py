@@ -0,0 +1,146 @@
+import aio_pika
+from datetime import datetime
+from aio_pika.abc import AbstractIncomingMessage
+from app.core.config import settings
+from app.repositories.queue_backend import QueueBackend
+from app.utils.retry_policy import queue_declarations
+import logging
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class AsyncQueueRepository(QueueBackend):
+    """
+    Conexion asyncio nativa a RabbitMQ. Corre en el event loop de la aplicacion,
+    se reconecta sola (connect_robust) y se usa para consumir y derivar mensajes
+    a las colas de reintento. Cada cola consumida tiene su propio canal, asi el prefetch se
+    configura por cola.
+
+    Para publicar usa `publisher_channels` canales con publisher confirms que se
+    comparten en round robin sin reservarlos: varias publicaciones concurrentes
+    van por el mismo canal sin esperar la confirmacion de la anterior, y aiormq
+    resuelve cada una cuando llega su Basic.Ack (incluidos los acks multiples)
+    o falla con DeliveryError si llega un Basic.Nack.
+    """
+
+    def __init__(self, publisher_channels: int = 1):
+        self._connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self._publisher_channels = publisher_channels
+        self._channels: List[aio_pika.abc.AbstractChannel] = []
+        self._next_channel = count()
+        self._consumers: Dict[
+            str, tuple[aio_pika.abc.AbstractChannel, aio_pika.abc.AbstractQueue]
+        ] = {}
+
+    async def connect(self):
+        try:
+            self._connection = await aio_pika.connect_robust(settings.RABBITMQ_HOST)
+            channels = [
+                await self._connection.channel(publisher_confirms=True)
+                for _ in range(self._publisher_channels)
+            ]
+            for queue in (settings.RABBITMQ_QUEUE, settings.RABBITMQ_BULK_QUEUE):
+                await self._declare_queue(channels[0], queue)
+            self._channels = channels
+            logging.info("Conexión asíncrona a RabbitMQ establecida correctamente")
+        except Exception as e:
+            logging.error(f"Error al conectar con RabbitMQ: {str(e)}")
+            raise
+
+    async def _declare_queue(
+        self, channel: aio_pika.abc.AbstractChannel, queue: str
+    ) -> aio_pika.abc.AbstractQueue:
+        declared = [
+            await channel.declare_queue(name, durable=True, arguments=arguments)
+            for name, arguments in queue_declarations(queue)
+        ]
+        return declared[0]
+
+    def is_connected(self) -> bool:
+        return (
+            self._connection is not None
+            and not self._connection.is_closed
+            and bool(self._channels)
+        )
+
+    async def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: Dict[str, Any] | None = None,
+        content_type: str | None = None,
+        message_id: str | None = None,
+        timestamp: datetime | None = None,
+        expiration_ms: int | None = None,
+    ):
+        channel = self._channels[next(self._next_channel) % len(self._channels)]
+        # Con confirms habilitados el await termina cuando el broker confirma
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=body,
+                headers=headers,
+                content_type=content_type,
+                message_id=message_id,
+                timestamp=timestamp,
+                # aio-pika recibe el vencimiento en segundos
+                expiration=expiration_ms / 1000 if expiration_ms else None,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
+
+    async def broadcast(self, exchange: str, body: bytes):
+        channel = self._channels[next(self._next_channel) % len(self._channels)]
+        declared = await self._declare_exchange(channel, exchange)
+        await declared.publish(aio_pika.Message(body=body), routing_key="")
+
+    async def subscribe(
+        self, exchange: str, callback: Callable[[bytes], Awaitable[Any]]
+    ) -> str:
+        channel = await self._connection.channel()
+        declared = await self._declare_exchange(channel, exchange)
+        # Cola exclusiva del proceso: cada suscripto recibe su copia y la cola
+        # se borra al cerrar la conexion
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(declared)
+
+        async def on_message(message: AbstractIncomingMessage):
+            await callback(message.body)
+
+        consumer_tag = await queue.consume(on_message, no_ack=True)
+        self._consumers[consumer_tag] = (channel, queue)
+        return consumer_tag
+
+    async def _declare_exchange(
+        self, channel: aio_pika.abc.AbstractChannel, exchange: str
+    ) -> aio_pika.abc.AbstractExchange:
+        return await channel.declare_exchange(
+            exchange, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+
+    async def consume(
+        self,
+        queue: str,
+        callback: Callable[[AbstractIncomingMessage], Awaitable[Any]],
+        prefetch_count: int,
+        on_channel_close: Callable[..., Any] | None = None,
+    ) -> str:
+        channel = await self._connection.channel()
+        await channel.set_qos(prefetch_count=prefetch_count)
+        if on_channel_close:
+            channel.close_callbacks.add(on_channel_close)
+        declared = await self._declare_queue(channel, queue)
+        consumer_tag = await declared.consume(callback, no_ack=False)
+        self._consumers[consumer_tag] = (channel, declared)
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str):
+        channel, queue = self._consumers.pop(consumer_tag, (None, None))
+        if queue and not channel.is_closed:
+            await queue.cancel(consumer_tag)
+
+    async def close(self):
+        self._channels = []
+        if self._connection and not self._connection.is_closed:
+            await self._connection.close()
+            logging.info("Conexión asíncrona a RabbitMQ cerrada")
@@ -0,0 +1,241 @@
+import asyncio
+from collections import deque
+from app.core.config import settings
+from app.repositories.queue_backend import QueueBackend
+from app.utils.retry_policy import queue_declarations
+import logging
+from functools import lru_cache
+from itertools import count
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+
+class InMemoryMessage:
+    """Mensaje entregado por InMemoryQueueBackend, con la interfaz de aio-pika."""
+
+    def __init__(
+        self,
+        consumer: "_InMemoryConsumer",
+        delivery_tag: int,
+        body: bytes,
+        headers: Dict[str, Any] | None = None,
+        content_type: str | None = None,
+        message_id: str | None = None,
+        timestamp: datetime | None = None,
+    ):
+        self._consumer = consumer
+        self.delivery_tag = delivery_tag
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = content_type
+        self.message_id = message_id
+        self.timestamp = timestamp
+
+    async def ack(self, multiple: bool = False):
+        self._consumer.ack(self.delivery_tag, multiple)
+
+    async def nack(self, requeue: bool = True):
+        self._consumer.nack(self.delivery_tag, requeue)
+
+
+class _InMemoryConsumer:
+    def __init__(
+        self,
+        backend: "InMemoryQueueBackend",
+        queue: str,
+        callback: Callable[[InMemoryMessage], Awaitable[Any]],
+        prefetch_count: int,
+    ):
+        self.backend = backend
+        self.queue = queue
+        self.callback = callback
+        self.prefetch_count = prefetch_count
+        self.unacked: Dict[int, InMemoryMessage] = {}
+        self.delivery_tags = count(1)
+
+    def ack(self, delivery_tag: int, multiple: bool):
+        acked = (
+            [tag for tag in self.unacked if tag <= delivery_tag]
+            if multiple
+            else [delivery_tag]
+        )
+        for tag in acked:
+            self.unacked.pop(tag, None)
+        self.backend._dispatch(self.queue)
+
+    def nack(self, delivery_tag: int, requeue: bool):
+        message = self.unacked.pop(delivery_tag, None)
+        if message and requeue:
+            self.backend._queues[self.queue].appendleft(
+                {
+                    "body": message.body,
+                    "headers": message.headers,
+                    "content_type": message.content_type,
+                    "message_id": message.message_id,
+                    "timestamp": message.timestamp,
+                }
+            )
+        self.backend._dispatch(self.queue)
+
+
+class InMemoryQueueBackend(QueueBackend):
+    """
+    Colas en memoria dentro del event loop, sin broker. Respeta el prefetch por
+    consumidor, los acks multiples y las colas de espera con TTL que devuelven
+    los mensajes a la cola original, asi el worker corre igual que con RabbitMQ.
+
+    Se usa para correr el flujo completo localmente (QUEUE_BACKEND=memory), en
+    los tests de punta a punta y en scripts/benchmark_pipeline.py. Los mensajes
+    se pierden al cerrar el proceso.
+    """
+
+    def __init__(self):
+        self._connected = False
+        # Cada mensaje encolado es un dict con el cuerpo y sus propiedades
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._arguments: Dict[str, Dict[str, Any] | None] = {}
+        self._consumers: Dict[str, _InMemoryConsumer] = {}
+        self._consumer_queues: Dict[str, str] = {}
+        # Suscriptos de cada exchange, por consumer tag
+        self._subscribers: Dict[str, Dict[str, Callable[[bytes], Awaitable[Any]]]] = {}
+        self._consumer_tags = count(1)
+        self._tasks: set[asyncio.Task] = set()
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._timer_ids = count(1)
+
+    async def connect(self):
+        for queue in (settings.RABBITMQ_QUEUE, settings.RABBITMQ_BULK_QUEUE):
+            self._declare_queue(queue)
+        self._connected = True
+        logging.info("Backend de colas en memoria listo")
+
+    def _declare_queue(self, queue: str):
+        for name, arguments in queue_declarations(queue):
+            self._queues.setdefault(name, deque())
+            self._arguments[name] = arguments
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: Dict[str, Any] | None = None,
+        content_type: str | None = None,
+        message_id: str | None = None,
+        timestamp: datetime | None = None,
+        expiration_ms: int | None = None,
+    ):
+        if routing_key not in self._queues:
+            raise ValueError(f"Cola inexistente: {routing_key}")
+        message = {
+            "body": body,
+            "headers": headers,
+            "content_type": content_type,
+            "message_id": message_id,
+            "timestamp": timestamp,
+        }
+
+        arguments = self._arguments[routing_key] or {}
+        if expiration_ms and "x-dead-letter-routing-key" in arguments:
+            # Cola de espera: el mensaje vuelve a la cola original al vencer
+            timer_id = next(self._timer_ids)
+            self._timers[timer_id] = asyncio.get_running_loop().call_later(
+                expiration_ms / 1000,
+                self._dead_letter,
+                timer_id,
+                arguments["x-dead-letter-routing-key"],
+                message,
+            )
+            return
+        self._queues[routing_key].append(message)
+        self._dispatch(routing_key)
+
+    def _dead_letter(self, timer_id: int, routing_key: str, message: Dict[str, Any]):
+        self._timers.pop(timer_id, None)
+        self._queues[routing_key].append(message)
+        self._dispatch(routing_key)
+
+    async def broadcast(self, exchange: str, body: bytes):
+        for callback in list(self._subscribers.get(exchange, {}).values()):
+            self._run(callback(body))
+
+    async def subscribe(
+        self, exchange: str, callback: Callable[[bytes], Awaitable[Any]]
+    ) -> str:
+        consumer_tag = f"in-memory-{next(self._consumer_tags)}"
+        self._subscribers.setdefault(exchange, {})[consumer_tag] = callback
+        return consumer_tag
+
+    def _run(self, coroutine: Awaitable[Any]):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _dispatch(self, queue: str):
+        consumer = self._consumers.get(queue)
+        if consumer is None:
+            return
+        pending = self._queues[queue]
+        while pending and len(consumer.unacked) < consumer.prefetch_count:
+            message = InMemoryMessage(
+                consumer, next(consumer.delivery_tags), **pending.popleft()
+            )
+            consumer.unacked[message.delivery_tag] = message
+            self._run(consumer.callback(message))
+
+    async def consume(
+        self,
+        queue: str,
+        callback: Callable[[InMemoryMessage], Awaitable[Any]],
+        prefetch_count: int,
+        on_channel_close: Callable[..., Any] | None = None,
+    ) -> str:
+        self._declare_queue(queue)
+        consumer_tag = f"in-memory-{next(self._consumer_tags)}"
+        self._consumer_queues[consumer_tag] = queue
+        self._consumers[queue] = _InMemoryConsumer(
+            self, queue, callback, prefetch_count
+        )
+        self._dispatch(queue)
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str):
+        # Los mensajes ya entregados se pueden seguir confirmando
+        queue = self._consumer_queues.pop(consumer_tag, None)
+        self._consumers.pop(queue, None)
+        for subscribers in self._subscribers.values():
+            subscribers.pop(consumer_tag, None)
+
+    def queue_length(self, queue: str) -> int:
+        return len(self._queues.get(queue, ()))
+
+    def is_idle(self) -> bool:
+        """
+        True si las colas consumidas no tienen mensajes por entregar, sin ack ni
+        esperando un reintento. Las colas de estacionamiento no se cuentan.
+        """
+        return (
+            not any(self._queues[queue] for queue in self._consumers)
+            and not any(consumer.unacked for consumer in self._consumers.values())
+            and not self._timers
+        )
+
+    async def wait_idle(self, poll_interval: float = 0.01):
+        while not self.is_idle():
+            await asyncio.sleep(poll_interval)
+
+    async def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._consumers.clear()
+        self._consumer_queues.clear()
+        self._subscribers.clear()
+        self._connected = False
+
+
+@lru_cache()
+def get_in_memory_backend() -> InMemoryQueueBackend:
+    return InMemoryQueueBackend()
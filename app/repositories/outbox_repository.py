@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+from app.models.outbox_message import OutboxMessage
+from typing import Any, Dict, List
+import json
+import logging
+
+
+def add_messages(db: Session, messages: List[Dict[str, Any]]):
+    logging.info(f"Guardando {len(messages)} mensajes en el outbox")
+    db.add_all(OutboxMessage(payload=json.dumps(message)) for message in messages)
+    db.commit()
+
+
+def get_pending_messages(db: Session, limit: int) -> List[OutboxMessage]:
+    # SKIP LOCKED: si hay varias instancias, cada una toma filas distintas
+    return (
+        db.query(OutboxMessage)
+        .order_by(OutboxMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def delete_messages(db: Session, ids: List[int]):
+    db.query(OutboxMessage).filter(OutboxMessage.id.in_(ids)).delete(
+        synchronize_session=False
+    )
+    db.commit()
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.processed_chunk import ProcessedChunk
+
+
+def is_chunk_processed(db: Session, chunk_id: str) -> bool:
+    chunk = db.get(ProcessedChunk, chunk_id)
+    return chunk is not None and chunk.completed_at is not None
+
+
+def claim_chunk(db: Session, chunk_id: str, stale_before: datetime) -> bool:
+    """
+    Toma el bloque para procesarlo. Devuelve False si ya se completo o si otro
+    worker lo tomo y su lease no vencio (claimed_at posterior a stale_before).
+    """
+    now = datetime.now(timezone.utc)
+    db.add(ProcessedChunk(chunk_id=chunk_id, claimed_at=now))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        # Otra copia del bloque ya lo tomo
+        db.rollback()
+
+    # Se retoma solo si quedo sin completar y con el lease vencido; el UPDATE
+    # condicional hace que una sola copia lo consiga
+    taken = (
+        db.query(ProcessedChunk)
+        .filter(
+            ProcessedChunk.chunk_id == chunk_id,
+            ProcessedChunk.completed_at.is_(None),
+            ProcessedChunk.claimed_at < stale_before,
+        )
+        .update({ProcessedChunk.claimed_at: now}, synchronize_session=False)
+    )
+    db.commit()
+    return taken == 1
+
+
+def renew_chunk_claim(db: Session, chunk_id: str):
+    db.query(ProcessedChunk).filter(
+        ProcessedChunk.chunk_id == chunk_id, ProcessedChunk.completed_at.is_(None)
+    ).update(
+        {ProcessedChunk.claimed_at: datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def release_chunk(db: Session, chunk_id: str):
+    """Libera un bloque que fallo para que el reintento lo pueda tomar."""
+    db.query(ProcessedChunk).filter(
+        ProcessedChunk.chunk_id == chunk_id, ProcessedChunk.completed_at.is_(None)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def mark_chunk_processed(db: Session, chunk_id: str):
+    db.query(ProcessedChunk).filter(ProcessedChunk.chunk_id == chunk_id).update(
+        {ProcessedChunk.completed_at: datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def delete_chunks_processed_before(db: Session, cutoff: datetime) -> int:
+    deleted = (
+        db.query(ProcessedChunk)
+        .filter(ProcessedChunk.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict
+from app.core.config import settings
+
+
+class QueueBackend(ABC):
+    """
+    Transporte de mensajes usado por el publicador de los endpoints y por el
+    worker. Los mensajes que entrega `consume` exponen `body`, `headers`,
+    `delivery_tag`, `content_type`, `message_id`, `timestamp`, `ack(multiple)`
+    y `nack(requeue)`, como los de aio-pika.
+    """
+
+    @abstractmethod
+    async def connect(self):
+        """Conecta y declara las colas de trabajo con sus colas de reintento."""
+
+    @abstractmethod
+    def is_connected(self) -> bool: ...
+
+    @abstractmethod
+    async def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: Dict[str, Any] | None = None,
+        content_type: str | None = None,
+        message_id: str | None = None,
+        timestamp: datetime | None = None,
+        expiration_ms: int | None = None,
+    ):
+        """
+        Publica un mensaje persistente. Termina cuando el broker lo confirma.
+        Con `expiration_ms` el mensaje vence en la cola luego de esa demora.
+        """
+
+    @abstractmethod
+    async def broadcast(self, exchange: str, body: bytes):
+        """Publica un mensaje que recibe cada proceso suscripto a `exchange`."""
+
+    @abstractmethod
+    async def subscribe(
+        self, exchange: str, callback: Callable[[bytes], Awaitable[Any]]
+    ) -> str:
+        """
+        Recibe, en una cola propia del proceso, los mensajes que se publiquen en
+        `exchange` desde ahora. Devuelve el consumer tag para `cancel`.
+        """
+
+    @abstractmethod
+    async def consume(
+        self,
+        queue: str,
+        callback: Callable[[Any], Awaitable[Any]],
+        prefetch_count: int,
+        on_channel_close: Callable[..., Any] | None = None,
+    ) -> str:
+        """Empieza a consumir la cola y devuelve el consumer tag."""
+
+    @abstractmethod
+    async def cancel(self, consumer_tag: str): ...
+
+    @abstractmethod
+    async def close(self): ...
+
+
+def create_queue_backend(publisher_channels: int = 1) -> QueueBackend:
+    """
+    Backend configurado en QUEUE_BACKEND. El de memoria es unico por proceso
+    para que el publicador y el worker compartan las colas.
+    """
+    if settings.QUEUE_BACKEND == "memory":
+        from app.repositories.in_memory_queue_backend import get_in_memory_backend
+
+        return get_in_memory_backend()
+
+    from app.repositories.async_queue_repository import AsyncQueueRepository
+
+    return AsyncQueueRepository(publisher_channels=publisher_channels)
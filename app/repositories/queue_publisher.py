@@ -0,0 +1,147 @@
+import asyncio
+from fastapi import HTTPException, status
+from aio_pika.exceptions import DeliveryError
+from app.core.config import settings
+from app.repositories.queue_backend import QueueBackend, create_queue_backend
+from app.utils.message_envelope import Envelope, encode_message
+from app.utils.queue_routing import queue_for_event
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List
+
+# Segundos entre intentos de reconexion en segundo plano
+RECONNECT_INTERVAL = 3
+
+
+class QueuePublisher:
+    """
+    Publicador compartido por todos los requests del proceso. Publica sobre un
+    unico QueueBackend de larga vida (con RabbitMQ: una conexion robusta y unos
+    pocos canales con publisher confirms) en lugar de abrir una conexion nueva
+    por request.
+    """
+
+    def __init__(self, backend: QueueBackend | None = None):
+        self._backend = backend or create_queue_backend(
+            publisher_channels=settings.RABBITMQ_PUBLISHER_CHANNELS
+        )
+        self._reconnect_task: asyncio.Task | None = None
+
+    async def connect(self):
+        await self._backend.connect()
+        logging.info("Publicador de mensajes conectado correctamente")
+
+    def is_connected(self) -> bool:
+        return self._backend.is_connected()
+
+    def start_reconnecting(self):
+        """
+        Reconecta en segundo plano. Mientras tanto los requests fallan rapido
+        en lugar de esperar el handshake con el broker.
+        """
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        while not self.is_connected():
+            try:
+                await self.connect()
+            except Exception:
+                await asyncio.sleep(RECONNECT_INTERVAL)
+
+    async def _publish(self, envelope: Envelope, routing_key: str):
+        await self._backend.publish(
+            routing_key,
+            envelope.body,
+            envelope.headers,
+            content_type=envelope.content_type,
+            message_id=envelope.message_id,
+            timestamp=envelope.timestamp,
+        )
+
+    def _ensure_connected(self):
+        if not self.is_connected():
+            logging.error("Publicador de RabbitMQ sin conexión, mensaje rechazado")
+            self.start_reconnecting()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Cola de mensajes no disponible",
+            )
+
+    async def send_message(self, message: Dict[str, Any]) -> bool:
+        self._ensure_connected()
+        return await self._send(message)
+
+    async def send_batch(
+        self, messages: List[Dict[str, Any]]
+    ) -> List[HTTPException | None]:
+        """
+        Publica todos los mensajes a la vez, sin esperar la confirmación de uno
+        para enviar el siguiente. Devuelve, en el mismo orden, None para los
+        mensajes confirmados y el error para los que no se pudieron encolar.
+        """
+        self._ensure_connected()
+        results = await asyncio.gather(
+            *(self._send(message) for message in messages), return_exceptions=True
+        )
+        return [None if result is True else result for result in results]
+
+    async def _send(self, message: Dict[str, Any]) -> bool:
+        try:
+            logging.info(f"Enviando mensaje a RabbitMQ: {message}")
+            envelope = encode_message(message)
+            await asyncio.wait_for(
+                self._publish(envelope, queue_for_event(message.get("event_type"))),
+                timeout=settings.RABBITMQ_PUBLISH_TIMEOUT,
+            )
+
+            logging.info(f"Mensaje enviado a la queue: {envelope.message_id}")
+            return True
+
+        except DeliveryError as e:
+            logging.error(f"RabbitMQ rechazó el mensaje: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Cola de mensajes no disponible",
+            )
+
+        except asyncio.TimeoutError:
+            logging.error("Tiempo de espera agotado al publicar en RabbitMQ")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Cola de mensajes no disponible",
+            )
+
+        except Exception as e:
+            logging.error(f"Error al enviar mensaje a RabbitMQ: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor",
+            )
+
+    async def broadcast(self, exchange: str, body: bytes):
+        """Publica un aviso que reciben todos los procesos suscriptos a `exchange`."""
+        self._ensure_connected()
+        try:
+            await asyncio.wait_for(
+                self._backend.broadcast(exchange, body),
+                timeout=settings.RABBITMQ_PUBLISH_TIMEOUT,
+            )
+        except Exception as e:
+            logging.error(f"Error al publicar en el exchange {exchange}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Cola de mensajes no disponible",
+            )
+
+    async def close(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        await self._backend.close()
+        logging.info("Publicador de mensajes cerrado")
+
+
+@lru_cache()
+def get_queue_publisher() -> QueuePublisher:
+    return QueuePublisher()
@@ -1,13 +1,36 @@
 from fastapi import HTTPException, status
 from app.schemas.notification_schemas import UserPreferences
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
 from app.models.user import User
+from typing import Dict, List
 
 
 def get_user_by_id(db: Session, user_id: int) -> User | None:
     return db.get(User, user_id)
 
 
+def get_users_by_ids(db: Session, user_ids: List[int]) -> Dict[int, User]:
+    users = db.query(User).filter(User.id.in_(user_ids)).populate_existing().all()
+    return {user.id: user for user in users}
+
+
+def create_default_users(db: Session, user_ids: List[int]):
+    """
+    Crea con las preferencias default a los usuarios que no existen, en un solo
+    INSERT. Los que ya existen (por ejemplo, creados por otro worker en el
+    medio) se ignoran.
+    """
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(
+        insert(User)
+        .values([{"id": user_id} for user_id in user_ids])
+        .on_conflict_do_nothing(index_elements=[User.id])
+    )
+    db.commit()
+
+
 def create_user(db: Session, user_id: int):
     existing_user = get_user_by_id(db, user_id)
     if existing_user:
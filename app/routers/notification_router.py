@@ -1,7 +1,9 @@
 import traceback
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import OAuth2PasswordBearer
 from typing import Annotated
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.db.dependencies import get_db
 from app.schemas.notification_schemas import (
@@ -10,6 +12,7 @@ from app.schemas.notification_schemas import (
     CourseNotificationEvent,
     FCMToken,
     AuxiliaryTeacherNotificationEvent,
+    NotificationBatch,
 )
 from app.controller.user_controller import (
     handle_validate_user,
@@ -18,7 +21,12 @@ from app.controller.user_controller import (
     handle_get_user_logs,
     handle_edit_fcm_token,
 )
-from app.controller.notification_controller import handle_add_queue_message
+from app.controller.notification_controller import (
+    handle_add_queue_message,
+    handle_add_queue_messages,
+    handle_invalidate_course_users,
+    handle_get_cache_metrics,
+)
 import logging
 
 router = APIRouter()
@@ -95,6 +103,7 @@ async def get_user_preferences(
 async def create_user_notification(
     notification: UserNotificationEvent,
     token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
 ):
     """
     Crea una notificación de usuario y la agrega a la cola de mensajes.
@@ -108,7 +117,7 @@ async def create_user_notification(
                 detail="Credenciales de autenticación inválidas",
             )
 
-        if handle_add_queue_message(notification):
+        if await handle_add_queue_message(notification, db):
             return {
                 "success": True,
                 "message": "Mensaje agregado a la cola correctamente.",
@@ -138,6 +147,7 @@ async def create_user_notification(
 async def create_course_notification(
     notification: CourseNotificationEvent,
     token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
 ):
     """
     Crea una notificación de curso y la agrega a la cola de mensajes.
@@ -151,7 +161,7 @@ async def create_course_notification(
                 detail="Credenciales de autenticación inválidas",
             )
 
-        if handle_add_queue_message(notification):
+        if await handle_add_queue_message(notification, db):
             return {
                 "success": True,
                 "message": "Mensaje agregado a la cola correctamente.",
@@ -240,6 +250,7 @@ async def edit_fmc_token(
 async def create_user_notification(
     notification: AuxiliaryTeacherNotificationEvent,
     token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
 ):
     """
     Crea una notificación de docente auxiliar y la agrega a la cola de mensajes.
@@ -253,7 +264,7 @@ async def create_user_notification(
                 detail="Credenciales de autenticación inválidas",
             )
 
-        if handle_add_queue_message(notification):
+        if await handle_add_queue_message(notification, db):
             return {
                 "success": True,
                 "message": "Mensaje agregado a la cola correctamente.",
@@ -277,3 +288,106 @@ async def create_user_notification(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor",
         )
+
+
+@router.post(
+    "/notify/batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": NotificationBatch.model_json_schema(
+                        ref_template="#/components/schemas/{model}"
+                    )
+                }
+            },
+        }
+    },
+)
+async def create_notifications_batch(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
+):
+    """
+    Agrega a la cola varias notificaciones (de usuario, curso o docente auxiliar)
+    validando el token una sola vez. Devuelve el resultado de cada item en el
+    mismo orden en que se enviaron.
+    """
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        # Se validan los bytes del body en una sola pasada, sin json.loads previo
+        try:
+            batch = NotificationBatch.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+
+        results = await handle_add_queue_messages(batch.notifications, db)
+        return {
+            "success": all(result["success"] for result in results),
+            "results": results,
+        }
+
+    except (HTTPException, RequestValidationError):
+        raise
+
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al crear batch de notificaciones: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.post("/courses/{id_course}/invalidate-users")
+async def invalidate_course_users(
+    id_course: str,
+    token: Annotated[str, Depends(oauth2_scheme)],
+):
+    """
+    Descarta el listado de inscriptos cacheado del curso en todos los procesos
+    worker. Lo llama el courses service cuando cambian las inscripciones.
+    """
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        await handle_invalidate_course_users(id_course)
+        return {"success": True}
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logging.error(f"Exception no manejada al invalidar cache de curso: {str(e)}")
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/metrics/cache")
+async def get_cache_metrics():
+    """
+    Aciertos, fallos y tamaño de las caches en memoria de este proceso.
+    """
+    return handle_get_cache_metrics()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Annotated, List, Literal, Union, get_args
 from enum import Enum
 
 
@@ -7,6 +7,10 @@ class NotificationEventType(str, Enum):
     USER = "user_notification"
     COURSE = "course_notification"
     AUX_TEACHER = "aux_teacher_notification"
+    # Sub-tarea interna de un fan-out de curso, no se recibe por la API
+    COURSE_CHUNK = "course_chunk_notification"
+    # Aviso al owner de un assessment, lo encola el worker aparte
+    ASSESSMENT_OWNER = "assessment_owner_notification"
 
 
 class NotificationEventData(BaseModel):
@@ -20,7 +24,7 @@ class NotificationEventData(BaseModel):
 
 
 class UserNotificationEvent(BaseModel):
-    event_type: NotificationEventType = NotificationEventType.USER
+    event_type: Literal[NotificationEventType.USER] = NotificationEventType.USER
     id_user: int
     notification_type: Literal["Examen", "Tarea"]
     event: Literal["Entregado", "Calificado"]
@@ -44,8 +48,20 @@ class UserNotificationEvent(BaseModel):
         }
 
 
+class AssessmentOwnerNotificationEvent(UserNotificationEvent):
+    """
+    Aviso al owner del assessment de una notificacion de usuario. Se encola
+    aparte para que, si falla, el reintento no vuelva a notificar al alumno.
+    """
+
+    event_type: Literal[NotificationEventType.ASSESSMENT_OWNER] = (
+        NotificationEventType.ASSESSMENT_OWNER
+    )
+    assessment_owner_id: int
+
+
 class CourseNotificationEvent(BaseModel):
-    event_type: NotificationEventType = NotificationEventType.COURSE
+    event_type: Literal[NotificationEventType.COURSE] = NotificationEventType.COURSE
     id_course: str
     notification_type: Literal["Examen", "Tarea"]
     event: Literal["Nuevo", "Actualizado"]
@@ -67,6 +83,20 @@ class CourseNotificationEvent(BaseModel):
         }
 
 
+class CourseChunkNotificationEvent(CourseNotificationEvent):
+    """
+    Parte de un fan-out de curso con un bloque de destinatarios. El chunk_id es
+    el mismo cada vez que se divide el mismo evento, asi un bloque reentregado
+    o republicado no se notifica dos veces.
+    """
+
+    event_type: Literal[NotificationEventType.COURSE_CHUNK] = (
+        NotificationEventType.COURSE_CHUNK
+    )
+    chunk_id: str
+    recipients: List[int]
+
+
 class UserPreferences(BaseModel):
     examen_email: bool | None = None
     examen_push: bool | None = None
@@ -88,9 +118,53 @@ class UserPermissions(
 
 
 class AuxiliaryTeacherNotificationEvent(BaseModel):
-    event_type: NotificationEventType = NotificationEventType.AUX_TEACHER
+    event_type: Literal[NotificationEventType.AUX_TEACHER] = (
+        NotificationEventType.AUX_TEACHER
+    )
     event: Literal["add", "remove", "update"]
     id_course: str
     course_name: str
     teacher_id: int
     permissions: UserPermissions = None  # en delete este campo no viene
+
+
+# Tipos de evento que se reciben por la API: para agregar uno nuevo se suma su
+# modelo (con event_type Literal) a esta union.
+NotificationEvent = Annotated[
+    Union[
+        UserNotificationEvent,
+        CourseNotificationEvent,
+        AuxiliaryTeacherNotificationEvent,
+    ],
+    Field(discriminator="event_type"),
+]
+
+# Sub-tareas que publican los propios workers, no se reciben por la API
+INTERNAL_EVENT_MODELS = (
+    CourseChunkNotificationEvent,
+    AssessmentOwnerNotificationEvent,
+)
+
+# Lo que puede llegar por la cola: los miembros de NotificationEvent mas las
+# sub-tareas internas. Se arma a partir de la union de la API, asi cada tipo
+# se registra en un solo lugar.
+QueuedNotificationEvent = Annotated[
+    Union[get_args(get_args(NotificationEvent)[0]) + INTERNAL_EVENT_MODELS],
+    Field(discriminator="event_type"),
+]
+
+# Se construye una sola vez: valida bytes JSON (o dicts) directo al modelo del
+# event_type, sin un json.loads previo ni una segunda validacion.
+notification_event_adapter: TypeAdapter[QueuedNotificationEvent] = TypeAdapter(
+    QueuedNotificationEvent
+)
+
+# Tope de items por request de /notify/batch
+MAX_BATCH_NOTIFICATIONS = 1000
+
+
+class NotificationBatch(BaseModel):
+    # En el batch event_type es obligatorio, es lo que identifica cada item
+    notifications: List[NotificationEvent] = Field(
+        min_length=1, max_length=MAX_BATCH_NOTIFICATIONS
+    )
@@ -1,35 +1,118 @@
 from fastapi import HTTPException
 from app.core.config import settings
+from app.core.http_clients import get_courses_client
+from app.utils.ttl_cache import TTLCache
 import httpx
 import logging
+from functools import lru_cache
+from typing import AsyncIterator, List
+
+
+@lru_cache()
+def get_roster_cache() -> TTLCache[List[int]]:
+    return TTLCache(ttl=settings.COURSE_ROSTER_CACHE_TTL)
 
 
 async def get_course_users(course_id: str):
     """
     Obtiene los datos del curso con el courses service y devuelve el listado de user_id del curso.
+    El listado se guarda COURSE_ROSTER_CACHE_TTL segundos o hasta que se invalide.
     """
+    roster_cache = get_roster_cache()
+    users_list = roster_cache.get(course_id)
+    if users_list is not None:
+        logging.info(f"Usuarios del curso {course_id} obtenidos de la cache")
+        return users_list
+
     # Llamar al auth service para validar el token
-    async with httpx.AsyncClient() as client:
-        try:
-            logging.info(
-                f"Obteniendo usuarios del curso {course_id} desde {settings.COURSES_SERVICE_URL}/courses/{course_id}"
-            )
+    client = get_courses_client()
+    try:
+        logging.info(
+            f"Obteniendo usuarios del curso {course_id} desde {settings.COURSES_SERVICE_URL}/courses/{course_id}"
+        )
 
-            response = await client.get(
-                f"{settings.COURSES_SERVICE_URL}/courses/{course_id}",
-            )
+        response = await client.get(
+            f"{settings.COURSES_SERVICE_URL}/courses/{course_id}",
+        )
 
-            if response.status_code == 200:
-                logging.info("Curso obtenido exitosamente")
-                course_data = response.json()
-                users_list = course_data.get("enrolled_users")
-                return users_list
-            return None
+        if response.status_code == 200:
+            logging.info("Curso obtenido exitosamente")
+            course_data = response.json()
+            users_list = course_data.get("enrolled_users")
+            if users_list is not None:
+                roster_cache.set(course_id, users_list)
+            return users_list
+        return None
 
+    except httpx.RequestError as e:
+        logging.error(f"Error al conectar con el servicio de cursos: {str(e)}")
+        logging.error(f"URL: {settings.COURSES_SERVICE_URL}/courses/{course_id}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con el servicio de usuarios",
+        )
+
+
+def invalidate_course_users(course_id: str) -> bool:
+    """
+    Descarta el listado cacheado del curso en este proceso. Devuelve True si
+    habia una entrada en la cache.
+    """
+    invalidated = get_roster_cache().invalidate(course_id)
+    logging.info(f"Cache de usuarios del curso {course_id} invalidada")
+    return invalidated
+
+
+async def on_course_users_invalidated(body: bytes):
+    """
+    Aplica en este proceso una invalidacion recibida por
+    RABBITMQ_INVALIDATION_EXCHANGE; el cuerpo es el id del curso.
+    """
+    try:
+        invalidate_course_users(body.decode())
+    except Exception as e:
+        logging.error(f"Error al aplicar la invalidacion de un curso: {str(e)}")
+
+
+async def iter_course_users(course_id: str, page_size: int) -> AsyncIterator[List[int]]:
+    """
+    Devuelve los user_id del curso por paginas de hasta page_size, a medida que
+    se obtienen. Con COURSES_USERS_PAGE_PATH configurado cada pagina es un
+    request al courses service y nunca se tiene el listado completo en memoria;
+    si no, se pagina el listado de get_course_users (cacheado).
+    """
+    if not settings.COURSES_USERS_PAGE_PATH:
+        users_list = await get_course_users(course_id)
+        for start in range(0, len(users_list or []), page_size):
+            yield users_list[start : start + page_size]
+        return
+
+    url = settings.COURSES_SERVICE_URL + settings.COURSES_USERS_PAGE_PATH.format(
+        course_id=course_id
+    )
+    client = get_courses_client()
+    offset = 0
+    while True:
+        try:
+            response = await client.get(
+                url, params={"offset": offset, "limit": page_size}
+            )
         except httpx.RequestError as e:
             logging.error(f"Error al conectar con el servicio de cursos: {str(e)}")
-            logging.error(f"URL: {settings.COURSES_SERVICE_URL}/courses/{course_id}")
+            logging.error(f"URL: {url}")
+            raise HTTPException(
+                status_code=500,
+                detail="Error al conectar con el servicio de cursos",
+            )
+        if response.status_code != 200:
             raise HTTPException(
                 status_code=500,
-                detail="Error al conectar con el servicio de usuarios",
+                detail=f"Error al obtener usuarios del curso: {course_id}",
             )
+
+        page = response.json()
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
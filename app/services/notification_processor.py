@@ -1,22 +1,48 @@
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from fastapi import HTTPException
+from app.core.config import settings
 from app.schemas.notification_schemas import (
     UserNotificationEvent,
     CourseNotificationEvent,
+    CourseChunkNotificationEvent,
     AuxiliaryTeacherNotificationEvent,
+    AssessmentOwnerNotificationEvent,
     NotificationEventType,
 )
 from app.schemas.user_schema import UserInfo
-from app.repositories.user_repository import get_user_by_id, create_user
-from app.services.courses_service import get_course_users
+from app.models.user import User
+from app.repositories.user_repository import (
+    get_user_by_id,
+    get_users_by_ids,
+    create_user,
+    create_default_users,
+)
+from app.services.courses_service import iter_course_users
 from app.services.email_notification import send_email
-from app.services.user_service import get_info_user
+from app.services.user_service import get_info_user, get_info_users
 from app.utils.notification_formatter import format_notification
+from app.utils.message_envelope import decode_message
+from app.utils.retry_policy import retry_window_ms
 
 from app.db.session import SessionLocal
 from app.repositories.notification_log_repository import create_log
+from app.repositories.outbox_repository import add_messages
+from app.repositories.processed_chunk_repository import (
+    claim_chunk,
+    delete_chunks_processed_before,
+    is_chunk_processed,
+    mark_chunk_processed,
+    release_chunk,
+    renew_chunk_claim,
+)
+from app.repositories.queue_publisher import get_queue_publisher
 from app.services.push_notification_service import send_push_notification
-import json
 import logging
+from typing import Any, AsyncIterator, Dict, List
 
 
 def get_user_preferences(user_id: int):
@@ -32,32 +58,70 @@ def get_user_preferences(user_id: int):
     except Exception as e:
         logging.error(f"Error al obtener usuario: {str(e)}")
         raise
+    finally:
+        if db:
+            db.close()
+
 
+def get_users_preferences(user_ids: List[int]) -> Dict[int, User]:
+    """
+    Obtiene las preferencias de varios usuarios con una sola consulta. Los que
+    no estan registrados se crean con los valores default en un solo INSERT.
+    """
+    db = None
+    try:
+        db = SessionLocal()
 
-async def process_message(body: bytes):
+        users = get_users_by_ids(db, user_ids)
+        # Ordenados para que dos workers insertando a la vez tomen los locks en
+        # el mismo orden
+        missing = sorted(set(user_ids) - users.keys())
+        if missing:
+            logging.info(f"Creando {len(missing)} usuarios no registrados")
+            create_default_users(db, missing)
+            users = get_users_by_ids(db, user_ids)
+        return users
+    except Exception as e:
+        logging.error(f"Error al obtener usuarios: {str(e)}")
+        raise
+    finally:
+        if db:
+            db.close()
+
+
+async def process_message(
+    body: bytes,
+    content_type: str | None = None,
+    headers: Dict[str, Any] | None = None,
+    message_id: str | None = None,
+) -> bool:
+    """
+    Procesa un mensaje de la cola. Devuelve False si no se pudo procesar, para
+    que el worker lo derive a la cola de reintentos.
+    """
     try:
-        # Decodificar el mensaje de bytes a string
-        message_str = body.decode("utf-8")
-        message_dict = json.loads(message_str)
-        logging.info(f"Mensaje recibido: {message_dict}")
-        # Determinar el tipo de mensaje basado en las claves presentes
-        event_type = message_dict.get("event_type")
+        notification = decode_message(body, content_type, headers)
+        logging.info(f"Mensaje recibido: {notification}")
+        # Determinar el tipo de mensaje basado en el event_type
+        event_type = notification.event_type
         if event_type == NotificationEventType.USER:
-            notification = UserNotificationEvent(**message_dict)
             await process_user_notification(notification)
         elif event_type == NotificationEventType.COURSE:
-            notification = CourseNotificationEvent(**message_dict)
-            await process_course_notification(notification)
+            await process_course_notification(notification, message_id)
         elif event_type == NotificationEventType.AUX_TEACHER:
-            notification = AuxiliaryTeacherNotificationEvent(**message_dict)
             await process_aux_teacher_notification(notification)
-        else:  # No deberia entrar nunca aca, se valida el formato con el endpoint de la API
-            logging.error(f"Mensaje con formato inválido: {message_dict}")
+        elif event_type == NotificationEventType.COURSE_CHUNK:
+            await process_course_chunk(notification)
+        elif event_type == NotificationEventType.ASSESSMENT_OWNER:
+            await send_owner_notification(notification)
+        return True
 
-    except json.JSONDecodeError as e:
-        logging.error(f"Error al decodificar el mensaje JSON: {str(e)}")
+    except ValueError as e:
+        # No deberia pasar, se valida el formato con el endpoint de la API
+        logging.error(f"Mensaje con formato inválido: {str(e)}")
     except Exception as e:
         logging.error(f"Error al procesar el mensaje: {str(e)}")
+    return False
 
 
 def should_notify(user, notification_type: str, method: str) -> bool:
@@ -68,57 +132,76 @@ def should_notify(user, notification_type: str, method: str) -> bool:
     return False
 
 
-def send_notifications(user, user_id, email, notification, subject, body):
+def send_notifications(user, user_id, email, notification, subject, body) -> bool:
+    """
+    Envia la notificación por los medios habilitados. Devuelve False solo si
+    fallaron todos los envíos que se intentaron: si alguno salió, reintentar el
+    mensaje lo repetiría, así que los medios fallidos solo se registran.
+    """
+    sent = False
+    failed = False
     if notification.event_type == NotificationEventType.AUX_TEACHER or should_notify(
         user, notification.notification_type, "email"
     ):
         logging.info(f"Procesando notificación EMAIL para usuario {user_id}")
         try:
             send_email(email, subject, body)
-
-            create_log(
-                db=SessionLocal(),
-                user_id=user_id,
-                notification_type=notification.notification_type
-                if notification.event_type != NotificationEventType.AUX_TEACHER
-                else "Auxiliar",
-                event=notification.event,
-                method="email",
-                subject=subject,
-                body=body,
-            )
         except Exception as e:
             logging.error(
                 f"Error al enviar notificación EMAIL para usuario {user_id}: {str(e)}"
             )
+            failed = True
+        else:
+            sent = True
+            save_notification_log(user_id, notification, "email", subject, body)
 
     if notification.event_type == NotificationEventType.AUX_TEACHER or should_notify(
         user, notification.notification_type, "push"
     ):
         logging.info(f"Procesando notificación de PUSH para usuario {user_id}")
+        if not user.token_fcm or not user.token_fcm.strip():
+            logging.warning(
+                f"Usuario {user_id} no tiene token FCM, no se enviará notificación PUSH"
+            )
+            return sent or not failed
         try:
-            if not user.token_fcm or not user.token_fcm.strip():
-                logging.warning(
-                    f"Usuario {user_id} no tiene token FCM, no se enviará notificación PUSH"
-                )
-                return
             send_push_notification(user.token_fcm, subject, body)
+        except Exception as e:
+            logging.error(
+                f"Error al enviar notificación PUSH para usuario {user_id}: {str(e)}"
+            )
+            failed = True
+        else:
+            sent = True
+            save_notification_log(user_id, notification, "push", subject, body)
 
+    return sent or not failed
+
+
+def save_notification_log(user_id, notification, method, subject, body):
+    """
+    Registra un envío ya realizado. Un error acá no marca el envío como
+    fallido, para no repetirlo al reintentar.
+    """
+    try:
+        with SessionLocal() as db:
             create_log(
-                db=SessionLocal(),
+                db=db,
                 user_id=user_id,
-                notification_type=notification.notification_type
-                if notification.event_type != NotificationEventType.AUX_TEACHER
-                else "Auxiliar",
+                notification_type=(
+                    notification.notification_type
+                    if notification.event_type != NotificationEventType.AUX_TEACHER
+                    else "Auxiliar"
+                ),
                 event=notification.event,
-                method="push",
+                method=method,
                 subject=subject,
                 body=body,
             )
-        except Exception as e:
-            logging.error(
-                f"Error al enviar notificación PUSH para usuario {user_id}: {str(e)}"
-            )
+    except Exception as e:
+        logging.error(
+            f"Error al registrar notificación {method} para usuario {user_id}: {str(e)}"
+        )
 
 
 async def process_user_notification(notification: UserNotificationEvent):
@@ -129,8 +212,10 @@ async def process_user_notification(notification: UserNotificationEvent):
 
         user_id = notification.id_user
 
-        # Obtener las preferencias del usuario
-        user = get_user_preferences(user_id)
+        # Obtener las preferencias del usuario. La DB y los envios (SMTP, FCM)
+        # son bloqueantes: corren en un thread para no frenar al event loop,
+        # que comparten los endpoints y el resto de los mensajes en proceso
+        user = await asyncio.to_thread(get_user_preferences, user_id)
 
         # Buscar usuario por id para el email, no lo recibo desde assessments
         try:
@@ -147,10 +232,22 @@ async def process_user_notification(notification: UserNotificationEvent):
             notification.notification_type, notification.event, notification
         )
 
-        send_notifications(user, user_id, user_info.email, notification, subject, body)
+        if not await asyncio.to_thread(
+            send_notifications,
+            user,
+            user_id,
+            user_info.email,
+            notification,
+            subject,
+            body,
+        ):
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al enviar la notificación al usuario: {user_id}",
+            )
 
         if notification.assessment_owner_id:
-            await send_owner_notification(notification)
+            await publish_owner_notification(notification)
 
     except Exception as e:
         logging.error(f"Error al procesar notificación de usuario: {str(e)}")
@@ -159,44 +256,92 @@ async def process_user_notification(notification: UserNotificationEvent):
         )
 
 
-async def send_owner_notification(notification: UserNotificationEvent):
-    logging.info(
-        f"Enviando notificación al owner de assessment: {notification.assessment_owner_id}"
-    )
-    owner_id = notification.assessment_owner_id
+async def publish_owner_notification(notification: UserNotificationEvent):
+    """
+    Encola el aviso al owner del assessment como un mensaje propio: si falla se
+    reintenta solo, sin volver a notificar al alumno. Si la cola no esta
+    disponible se guarda en el outbox.
+    """
+    message = AssessmentOwnerNotificationEvent(
+        **notification.model_dump(exclude={"event_type"})
+    ).model_dump(mode="json")
+    try:
+        await get_queue_publisher().send_message(message)
+    except HTTPException as e:
+        if not settings.OUTBOX_ENABLED:
+            logging.error(
+                f"No se pudo encolar la notificación al owner {notification.assessment_owner_id}: {e.detail}"
+            )
+            return
+        await asyncio.to_thread(save_to_outbox, [message])
 
-    owner = get_user_preferences(owner_id)
+
+def save_to_outbox(messages: List[Dict[str, Any]]):
+    with SessionLocal() as db:
+        add_messages(db, messages)
+
+
+async def send_owner_notification(notification: AssessmentOwnerNotificationEvent):
     try:
-        owner_data_info = await get_info_user(owner_id)
-        owner_info = UserInfo(**owner_data_info)
-    except Exception:
-        logging.error(f"Error al obtener información del owner {owner_id}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al obtener información del owner: {owner_id}",
+        logging.info(
+            f"Enviando notificación al owner de assessment: {notification.assessment_owner_id}"
         )
-    logging.info(f"Owner de assessment obtenido: {owner_info}")
+        owner_id = notification.assessment_owner_id
 
-    owner_subject, owner_body = format_notification(
-        notification.notification_type,
-        "EntregaOwner",
-        notification,
-    )
+        owner = await asyncio.to_thread(get_user_preferences, owner_id)
+        try:
+            owner_data_info = await get_info_user(owner_id)
+            owner_info = UserInfo(**owner_data_info)
+        except Exception:
+            logging.error(f"Error al obtener información del owner {owner_id}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al obtener información del owner: {owner_id}",
+            )
+        logging.info(f"Owner de assessment obtenido: {owner_info}")
 
-    send_notifications(
-        owner, owner_id, owner_info.email, notification, owner_subject, owner_body
-    )
+        owner_subject, owner_body = format_notification(
+            notification.notification_type,
+            "EntregaOwner",
+            notification,
+        )
+
+        if not await asyncio.to_thread(
+            send_notifications,
+            owner,
+            owner_id,
+            owner_info.email,
+            notification,
+            owner_subject,
+            owner_body,
+        ):
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al enviar la notificación al owner: {owner_id}",
+            )
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logging.error(f"Error al procesar notificación al owner: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error al procesar notificación al owner"
+        )
 
 
-async def process_course_notification(notification: CourseNotificationEvent):
+async def process_course_notification(
+    notification: CourseNotificationEvent, message_id: str | None = None
+):
     try:
         logging.info(
             f"Procesando notificación de curso: {notification.id_course}, tipo: {notification.notification_type}, evento: {notification.event}"
         )
 
-        # Obtener todos los usuarios del curso
-        user_list = await get_course_users(notification.id_course)
-        if not user_list:
+        # Los usuarios del curso llegan por paginas de COURSE_CHUNK_SIZE
+        pages = iter_course_users(notification.id_course, settings.COURSE_CHUNK_SIZE)
+        first_page = await anext(pages, None)
+        if not first_page:
             logging.warning(
                 f"No se encontraron usuarios para el curso {notification.id_course}"
             )
@@ -205,36 +350,294 @@ async def process_course_notification(notification: CourseNotificationEvent):
                 detail=f"Error al obtener informacion del curso: {notification.id_course}",
             )
 
-        for user_id in user_list:
-            try:
-                user_data_info = await get_info_user(user_id)
-                user_info = UserInfo(**user_data_info)
-            except Exception:
-                logging.error(f"Error al obtener información del usuario {user_id}")
-                continue
-            logging.info(f"Usuario obtenido: {user_info}")
+        second_page = await anext(pages, None)
+        if second_page is None:
+            # Entra en un solo bloque: se notifica directamente
+            await notify_course_users(notification, first_page)
+            return
 
-            # Obtener las preferencias del usuario
-            user = get_user_preferences(user_id)
+        await publish_course_chunks(
+            notification, _prepend_pages([first_page, second_page], pages), message_id
+        )
 
-            subject, body = format_notification(
-                notification.notification_type, notification.event, notification
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logging.error(f"Error al procesar notificación de curso: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error al procesar notificación de curso"
+        )
+
+
+def course_event_key(
+    notification: CourseNotificationEvent, message_id: str | None = None
+) -> str:
+    """
+    Identifica al evento de curso para armar los ids de sus bloques: el
+    message_id, que se conserva en los reintentos, o un hash del contenido.
+    """
+    return (
+        message_id
+        or hashlib.sha256(notification.model_dump_json().encode()).hexdigest()
+    )
+
+
+def course_chunk_id(event_key: str, recipients: List[int]) -> str:
+    page_key = ",".join(str(user_id) for user_id in recipients)
+    return f"{event_key}:{hashlib.sha256(page_key.encode()).hexdigest()}"
+
+
+async def publish_course_chunks(
+    notification: CourseNotificationEvent,
+    pages: AsyncIterator[List[int]],
+    message_id: str | None = None,
+):
+    """
+    Publica un bloque por cada pagina del listado apenas llega, sin esperar a
+    las siguientes: los workers empiezan a notificar mientras se siguen
+    pidiendo paginas. El chunk_id depende del evento y de los destinatarios de
+    la pagina: si el listado cambia entre reintentos, las paginas corridas son
+    bloques nuevos y se envian, en lugar de descartarse por su posicion.
+    """
+    event_key = course_event_key(notification, message_id)
+    publisher = get_queue_publisher()
+    publishes: List[asyncio.Task] = []
+    try:
+        async for page in pages:
+            chunk = CourseChunkNotificationEvent(
+                **notification.model_dump(exclude={"event_type"}),
+                chunk_id=course_chunk_id(event_key, page),
+                recipients=page,
+            )
+            publishes.append(
+                asyncio.create_task(
+                    publisher.send_message(chunk.model_dump(mode="json"))
+                )
             )
+    finally:
+        results = await asyncio.gather(*publishes, return_exceptions=True)
+
+    logging.info(
+        f"Curso {notification.id_course}: destinatarios divididos en {len(publishes)} bloques"
+    )
+    if any(isinstance(result, Exception) for result in results):
+        # Se reintenta el evento completo, los bloques ya publicados se
+        # descartan al procesarse por su chunk_id
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al encolar los bloques del curso: {notification.id_course}",
+        )
+
 
-            send_notifications(
-                user, user_id, user_info.email, notification, subject, body
+async def _prepend_pages(
+    first_pages: List[List[int]], pages: AsyncIterator[List[int]]
+) -> AsyncIterator[List[int]]:
+    for page in first_pages:
+        yield page
+    async for page in pages:
+        yield page
+
+
+async def process_course_chunk(notification: CourseChunkNotificationEvent):
+    """
+    Notifica a los destinatarios de un bloque. El bloque se toma en la base
+    antes de enviar, asi dos copias del mismo chunk_id (reentregas o bloques
+    republicados al reintentar el evento de curso) no notifican dos veces.
+    """
+    chunk_id = notification.chunk_id
+    try:
+        if not await asyncio.to_thread(claim_course_chunk, chunk_id):
+            if await asyncio.to_thread(chunk_already_processed, chunk_id):
+                logging.info(f"Bloque {chunk_id} ya procesado, se descarta")
+                return
+            # Otra copia se esta procesando: se reintenta mas tarde y para
+            # entonces se descarta si ya termino o se retoma si quedo abandonada
+            raise HTTPException(
+                status_code=409,
+                detail=f"Bloque {chunk_id} en proceso en otro worker",
             )
 
+        renewal = asyncio.create_task(_renew_course_chunk_claim(chunk_id))
+        try:
+            await notify_course_users(notification, notification.recipients)
+        except Exception:
+            await asyncio.to_thread(release_course_chunk, chunk_id)
+            raise
+        finally:
+            renewal.cancel()
+        await asyncio.to_thread(save_processed_chunk, chunk_id)
+
     except HTTPException:
         raise
 
     except Exception as e:
-        logging.error(f"Error al procesar notificación de curso: {str(e)}")
+        logging.error(f"Error al procesar bloque de curso: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Error al procesar notificación de curso"
+            status_code=500, detail=f"Error al procesar bloque de curso"
         )
 
 
+async def _renew_course_chunk_claim(chunk_id: str):
+    while True:
+        await asyncio.sleep(settings.COURSE_CHUNK_CLAIM_TIMEOUT / 3)
+        try:
+            await asyncio.to_thread(renew_course_chunk_claim, chunk_id)
+        except Exception as e:
+            logging.warning(f"Error al renovar el bloque {chunk_id}: {str(e)}")
+
+
+def claim_course_chunk(chunk_id: str) -> bool:
+    stale_before = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.COURSE_CHUNK_CLAIM_TIMEOUT
+    )
+    db = SessionLocal()
+    try:
+        return claim_chunk(db, chunk_id, stale_before)
+    finally:
+        db.close()
+
+
+def renew_course_chunk_claim(chunk_id: str):
+    db = SessionLocal()
+    try:
+        renew_chunk_claim(db, chunk_id)
+    finally:
+        db.close()
+
+
+def release_course_chunk(chunk_id: str):
+    db = SessionLocal()
+    try:
+        release_chunk(db, chunk_id)
+    finally:
+        db.close()
+
+
+def chunk_already_processed(chunk_id: str) -> bool:
+    db = SessionLocal()
+    try:
+        return is_chunk_processed(db, chunk_id)
+    finally:
+        db.close()
+
+
+def save_processed_chunk(chunk_id: str):
+    db = SessionLocal()
+    try:
+        mark_chunk_processed(db, chunk_id)
+    finally:
+        db.close()
+
+
+def processed_chunks_cutoff() -> datetime:
+    """
+    Una marca de bloque procesado solo evita reenvios mientras el mensaje del
+    bloque puede volver a entregarse: durante la ventana completa de reintentos
+    mas PROCESSED_CHUNK_RETENTION. Las anteriores a este momento se pueden borrar.
+    """
+    return datetime.now(timezone.utc) - timedelta(
+        milliseconds=retry_window_ms(), seconds=settings.PROCESSED_CHUNK_RETENTION
+    )
+
+
+def purge_processed_chunks() -> int:
+    with SessionLocal() as db:
+        return delete_chunks_processed_before(db, processed_chunks_cutoff())
+
+
+# Pool propio para los envios (SMTP, FCM) del fan-out de curso: el executor por
+# defecto de asyncio se comparte con el resto de to_thread y tiene un tope de
+# min(32, cpus + 4) threads, que no depende de COURSE_FANOUT_CONCURRENCY.
+@lru_cache()
+def get_fanout_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.COURSE_FANOUT_CONCURRENCY,
+        thread_name_prefix="course-fanout",
+    )
+
+
+def shutdown_fanout_executor():
+    """Libera los threads del fan-out al detener el worker; el proximo uso crea un pool nuevo"""
+    if get_fanout_executor.cache_info().currsize:
+        get_fanout_executor().shutdown(wait=False)
+    get_fanout_executor.cache_clear()
+
+
+async def notify_course_users(
+    notification: CourseNotificationEvent, user_list: List[int]
+):
+    # La informacion y las preferencias de los destinatarios se obtienen por
+    # lotes antes del fan-out
+    users_info = await get_info_users(user_list)
+    users = await asyncio.to_thread(get_users_preferences, user_list)
+
+    # El contenido no depende del destinatario: se arma una sola vez y se
+    # comparte entre todos los usuarios y medios de envio
+    subject, body = format_notification(
+        notification.notification_type, notification.event, notification
+    )
+
+    # Fan-out concurrente y acotado: un destinatario lento o fallido no
+    # demora ni corta al resto
+    semaphore = asyncio.Semaphore(settings.COURSE_FANOUT_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            notify_course_user(
+                notification,
+                user_id,
+                users.get(user_id),
+                users_info.get(user_id),
+                subject,
+                body,
+                semaphore,
+            )
+            for user_id in user_list
+        )
+    )
+    failed = results.count(False)
+    if failed:
+        logging.warning(
+            f"Curso {notification.id_course}: {failed} de {len(user_list)} destinatarios no se pudieron notificar"
+        )
+
+
+async def notify_course_user(
+    notification: CourseNotificationEvent,
+    user_id: int,
+    user: User | None,
+    user_info: UserInfo | None,
+    subject: str,
+    body: str,
+    semaphore: asyncio.Semaphore,
+) -> bool:
+    """
+    Notifica a un usuario del curso. Los envíos (SMTP, FCM) corren en el pool
+    del fan-out para no frenar al resto de los destinatarios ni al event loop.
+    """
+    if user is None or user_info is None:
+        logging.error(f"Error al obtener información del usuario {user_id}")
+        return False
+
+    async with semaphore:
+        try:
+            logging.info(f"Usuario obtenido: {user_info}")
+
+            return await asyncio.get_running_loop().run_in_executor(
+                get_fanout_executor(),
+                send_notifications,
+                user,
+                user_id,
+                user_info.email,
+                notification,
+                subject,
+                body,
+            )
+        except Exception as e:
+            logging.error(f"Error al notificar al usuario {user_id}: {str(e)}")
+            return False
+
+
 async def process_aux_teacher_notification(
     notification: AuxiliaryTeacherNotificationEvent,
 ):
@@ -246,7 +649,7 @@ async def process_aux_teacher_notification(
         user_id = notification.teacher_id
 
         # Obtener las preferencias del usuario
-        user = get_user_preferences(user_id)
+        user = await asyncio.to_thread(get_user_preferences, user_id)
 
         # Buscar usuario por id para el email, no lo recibo desde courses
         try:
@@ -265,7 +668,19 @@ async def process_aux_teacher_notification(
             notification.event_type, notification.event, notification
         )
 
-        send_notifications(user, user_id, user_info.email, notification, subject, body)
+        if not await asyncio.to_thread(
+            send_notifications,
+            user,
+            user_id,
+            user_info.email,
+            notification,
+            subject,
+            body,
+        ):
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al enviar la notificación al usuario: {user_id}",
+            )
 
     except HTTPException:
         raise
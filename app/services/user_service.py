@@ -1,7 +1,12 @@
+import asyncio
+import hashlib
+import time
+from collections import Counter
 from fastapi import HTTPException
 from app.core.config import settings
 from sqlalchemy.orm import Session
 from app.schemas.notification_schemas import UserPreferences, FCMToken
+from app.schemas.user_schema import UserInfo
 from app.repositories.user_repository import (
     get_user_by_id,
     create_user,
@@ -10,41 +15,182 @@ from app.repositories.user_repository import (
 )
 from app.repositories.notification_log_repository import get_user_logs_by_id
 from app.core.auth import get_service_auth
+from app.core.http_clients import get_auth_client
+from app.utils.ttl_cache import TTLCache
+from pydantic import ValidationError
 import httpx
+import jwt
 import logging
+from functools import lru_cache
+from typing import Any, Dict, List
+
+# Marca en la cache a los usuarios que el auth service no encontro o devolvio
+# con datos invalidos
+USER_NOT_FOUND = object()
+_NOT_CACHED = object()
+
+
+@lru_cache()
+def get_user_info_cache() -> TTLCache[UserInfo]:
+    return TTLCache(
+        ttl=settings.USER_INFO_CACHE_TTL, max_size=settings.USER_INFO_CACHE_SIZE
+    )
+
+
+def _cache_user_data(user_id: int, user_data: Dict[str, Any]) -> UserInfo | None:
+    try:
+        user_info = UserInfo(**user_data)
+    except ValidationError:
+        logging.warning(f"Datos inválidos para el usuario {user_id}")
+        _cache_user_not_found(user_id)
+        return None
+    get_user_info_cache().set(user_id, user_info)
+    return user_info
+
+
+def _cache_user_not_found(user_id: int):
+    get_user_info_cache().set(
+        user_id, USER_NOT_FOUND, ttl=settings.USER_INFO_NEGATIVE_CACHE_TTL
+    )
+
+
+@lru_cache()
+def get_token_cache() -> TTLCache[int]:
+    return TTLCache(
+        ttl=settings.TOKEN_CACHE_MAX_TTL, max_size=settings.TOKEN_CACHE_SIZE
+    )
+
+
+@lru_cache()
+def get_token_validation_counts() -> Counter:
+    """Cantidad de validaciones de token resueltas por cada camino"""
+    return Counter(cache=0, local=0, local_fallback=0, remote=0, rejected=0)
+
+
+@lru_cache()
+def get_jwks_client() -> jwt.PyJWKClient:
+    # PyJWKClient cachea el JWKS y lo vuelve a pedir si aparece un kid nuevo
+    return jwt.PyJWKClient(
+        f"{settings.AUTH_SERVICE_URL}{settings.AUTH_JWKS_PATH}",
+        cache_keys=True,
+        lifespan=settings.AUTH_JWKS_CACHE_TTL,
+    )
 
 
 async def validate_user(token: str):
+    """
+    Valida al usuario y devuelve su id. Los tokens validos se cachean por su
+    hash hasta que vencen. Si hay JWKS configurado los JWT se verifican
+    localmente; si no, o si no se pueden verificar asi, se consulta al auth service.
+    """
+    counts = get_token_validation_counts()
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = get_token_cache().get(token_key)
+    if user_id is not None:
+        counts["cache"] += 1
+        return user_id
+
+    claims = None
+    if settings.AUTH_JWKS_PATH:
+        claims = await _verify_token_locally(token)
+    if claims is not None:
+        user_id = _user_id_from_claims(claims)
+    if user_id is not None:
+        counts["local"] += 1
+    else:
+        user_id = await _validate_user_remote(token)
+        counts["remote"] += 1
+        claims = _unverified_claims(token)
+
+    if user_id is not None:
+        _cache_token(token_key, user_id, claims.get("exp"))
+    return user_id
+
+
+async def _verify_token_locally(token: str) -> Dict[str, Any] | None:
+    """
+    Verifica la firma y el vencimiento del JWT con las claves del JWKS.
+    Devuelve None si el token no se puede verificar localmente (no es un JWT,
+    no tiene kid conocido o no se pudo obtener el JWKS).
+    """
+    counts = get_token_validation_counts()
+    try:
+        signing_key = await asyncio.to_thread(
+            get_jwks_client().get_signing_key_from_jwt, token
+        )
+    except (jwt.PyJWKClientError, jwt.InvalidTokenError) as e:
+        logging.warning(f"No se pudo verificar el token localmente: {str(e)}")
+        counts["local_fallback"] += 1
+        return None
+
+    try:
+        # La audiencia no se verifica, igual que al validar con /me/
+        return jwt.decode(
+            token,
+            signing_key,
+            algorithms=settings.AUTH_JWT_ALGORITHMS,
+            options={"require": ["exp"], "verify_aud": False},
+        )
+    except jwt.InvalidTokenError as e:
+        logging.info(f"Token rechazado: {str(e)}")
+        counts["rejected"] += 1
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+
+
+def _user_id_from_claims(claims: Dict[str, Any]):
+    user_id = claims.get(settings.AUTH_JWT_USER_ID_CLAIM)
+    if isinstance(user_id, str) and user_id.isdigit():
+        return int(user_id)
+    return user_id
+
+
+def _unverified_claims(token: str) -> Dict[str, Any]:
+    """Claims de un token ya validado por el auth service, solo para leer exp"""
+    try:
+        return jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return {}
+
+
+def _cache_token(token_key: str, user_id, expires_at):
+    ttl = settings.TOKEN_CACHE_MAX_TTL
+    if isinstance(expires_at, (int, float)):
+        ttl = min(ttl, expires_at - time.time())
+    get_token_cache().set(token_key, user_id, ttl=ttl)
+
+
+async def _validate_user_remote(token: str):
     """
     Valida al usuario con el auth service y devuelve el id del usuario.
     """
     # Llamar al auth service para validar el token
-    async with httpx.AsyncClient() as client:
-        try:
-            logging.info(f"Validando identidad del usuario con el token: {token}...")
+    client = get_auth_client()
+    try:
+        logging.info("Validando identidad del usuario con el auth service...")
 
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/me/",
-                headers={"Authorization": f"Bearer {token}"},
-            )
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/me/",
+            headers={"Authorization": f"Bearer {token}"},
+        )
 
-            if response.status_code == 200:
-                logging.info("Token valido")
-                user_data = response.json()
-                user_id = user_data.get("id")
-                return user_id
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Token inválido o expirado",
-            )
+        if response.status_code == 200:
+            logging.info("Token valido")
+            user_data = response.json()
+            user_id = user_data.get("id")
+            return user_id
+        get_token_validation_counts()["rejected"] += 1
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Token inválido o expirado",
+        )
 
-        except httpx.RequestError as e:
-            logging.error(f"Error al conectar con el servicio de usuarios: {str(e)}")
-            logging.error(f"URL: {settings.AUTH_SERVICE_URL}/me/")
-            raise HTTPException(
-                status_code=500,
-                detail="Error al conectar con el servicio de usuarios",
-            )
+    except httpx.RequestError as e:
+        logging.error(f"Error al conectar con el servicio de usuarios: {str(e)}")
+        logging.error(f"URL: {settings.AUTH_SERVICE_URL}/me/")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con el servicio de usuarios",
+        )
 
 
 def get_user(db: Session, user_id: int):
@@ -81,30 +227,43 @@ def edit_user(db: Session, user_id: int, preferences: UserPreferences):
 
 async def get_info_user(user_id: int, retry: bool = True):
     """
-    Obtiene la información del usuario.
+    Obtiene la información del usuario. El resultado se cachea, incluso si el
+    usuario no existe (por menos tiempo).
     """
+    cached = get_user_info_cache().get(user_id, _NOT_CACHED)
+    if cached is USER_NOT_FOUND:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Error al obtener informacion del usuario (ID {user_id})",
+        )
+    if cached is not _NOT_CACHED:
+        return cached.model_dump()
+
     try:
         auth_service = get_service_auth()
         access_token = auth_service.get_token()
 
         logging.info(f"Obteniendo información del usuario con id: {user_id}...")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/user/{user_id}",
-                headers={"Authorization": f"Bearer {access_token}"},
+        client = get_auth_client()
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/user/{user_id}",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        if response.status_code == 200:
+            user_data = response.json()
+            _cache_user_data(user_id, user_data)
+            return user_data
+        else:
+            if response.status_code == 401 and retry:
+                logging.warning("Token expirado o inválido, intentando renovar...")
+                await auth_service.renew_token(access_token)
+                return await get_info_user(user_id, retry=False)
+            if response.status_code == 404:
+                _cache_user_not_found(user_id)
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Error al obtener informacion del usuario (ID {user_id})",
             )
-            if response.status_code == 200:
-                user_data = response.json()
-                return user_data
-            else:
-                if response.status_code == 401 and retry:
-                    logging.warning("Token expirado o inválido, intentando renovar...")
-                    await auth_service.login()
-                    return await get_info_user(user_id, retry=False)
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Error al obtener informacion del usuario (ID {user_id})",
-                )
     except HTTPException as e:
         raise e
 
@@ -115,6 +274,127 @@ async def get_info_user(user_id: int, retry: bool = True):
         )
 
 
+async def get_info_users(user_ids: List[int]) -> Dict[int, UserInfo]:
+    """
+    Obtiene la información de varios usuarios por bloques de
+    USER_INFO_CHUNK_SIZE. Si el auth service tiene endpoint batch se hace un
+    request por bloque; si no, o si falla el bloque, se piden de a uno en
+    paralelo reutilizando las conexiones. Los usuarios que no se pudieron
+    obtener no aparecen en el resultado. Solo se piden los que no estan en cache.
+    """
+    auth_service = get_service_auth()
+    user_info_cache = get_user_info_cache()
+    user_ids = list(dict.fromkeys(user_ids))
+    users: Dict[int, UserInfo] = {}
+    pending = []
+    for user_id in user_ids:
+        cached = user_info_cache.get(user_id, _NOT_CACHED)
+        if cached is _NOT_CACHED:
+            pending.append(user_id)
+        elif cached is not USER_NOT_FOUND:
+            users[user_id] = cached
+
+    chunk_size = settings.USER_INFO_CHUNK_SIZE
+    chunks = [
+        pending[start : start + chunk_size]
+        for start in range(0, len(pending), chunk_size)
+    ]
+    semaphore = asyncio.Semaphore(settings.USER_INFO_CONCURRENCY)
+
+    logging.info(
+        f"Obteniendo información de {len(user_ids)} usuarios ({len(pending)} fuera de cache)..."
+    )
+    client = get_auth_client()
+    for chunk in chunks:
+        if settings.AUTH_USERS_BATCH_PATH:
+            try:
+                users.update(await _fetch_users_batch(client, auth_service, chunk))
+                continue
+            except Exception as e:
+                logging.warning(
+                    f"Error al obtener usuarios por lote, se piden de a uno: {str(e)}"
+                )
+
+        results = await asyncio.gather(
+            *(
+                _fetch_user_limited(client, auth_service, user_id, semaphore)
+                for user_id in chunk
+            )
+        )
+        users.update(
+            (user_id, user_info)
+            for user_id, user_info in zip(chunk, results)
+            if user_info is not None
+        )
+
+    missing = len(user_ids) - len(users)
+    if missing:
+        logging.warning(f"No se pudo obtener la información de {missing} usuarios")
+    return users
+
+
+async def _fetch_users_batch(
+    client: httpx.AsyncClient, auth_service, user_ids: List[int], retry: bool = True
+) -> Dict[int, UserInfo]:
+    access_token = auth_service.get_token()
+    response = await client.get(
+        f"{settings.AUTH_SERVICE_URL}{settings.AUTH_USERS_BATCH_PATH}",
+        params={"ids": ",".join(str(user_id) for user_id in user_ids)},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    if response.status_code == 401 and retry:
+        logging.warning("Token expirado o inválido, intentando renovar...")
+        await auth_service.renew_token(access_token)
+        return await _fetch_users_batch(client, auth_service, user_ids, retry=False)
+    response.raise_for_status()
+
+    users = {}
+    for user_data in response.json():
+        user_info = _cache_user_data(user_data.get("id"), user_data)
+        if user_info is not None:
+            users[user_info.id] = user_info
+    # Los que no vinieron en la respuesta no existen
+    for user_id in user_ids:
+        if user_id not in users:
+            _cache_user_not_found(user_id)
+    return users
+
+
+async def _fetch_user_limited(
+    client: httpx.AsyncClient,
+    auth_service,
+    user_id: int,
+    semaphore: asyncio.Semaphore,
+) -> UserInfo | None:
+    async with semaphore:
+        try:
+            return await _fetch_user(client, auth_service, user_id)
+        except Exception as e:
+            logging.error(
+                f"Error al obtener información del usuario {user_id}: {str(e)}"
+            )
+            return None
+
+
+async def _fetch_user(
+    client: httpx.AsyncClient, auth_service, user_id: int, retry: bool = True
+) -> UserInfo | None:
+    access_token = auth_service.get_token()
+    response = await client.get(
+        f"{settings.AUTH_SERVICE_URL}/user/{user_id}",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    if response.status_code == 401 and retry:
+        logging.warning("Token expirado o inválido, intentando renovar...")
+        await auth_service.renew_token(access_token)
+        return await _fetch_user(client, auth_service, user_id, retry=False)
+    if response.status_code == 404:
+        _cache_user_not_found(user_id)
+        return None
+    response.raise_for_status()
+    return _cache_user_data(user_id, response.json())
+
+
 def get_user_logs(db: Session, user_id: int, skip: int = 0, limit: int = 100):
     """
     Obtiene los logs del usuario.
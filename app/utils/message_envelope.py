@@ -0,0 +1,56 @@
+import uuid
+import msgpack
+from datetime import datetime, timezone
+from app.schemas.notification_schemas import (
+    QueuedNotificationEvent,
+    notification_event_adapter,
+)
+from typing import Any, Dict, NamedTuple
+
+# Version del formato de los mensajes que publica este servicio. Se sube cuando
+# cambia el schema de forma incompatible; los consumidores rechazan versiones
+# mas nuevas que la suya en lugar de interpretarlas mal.
+SCHEMA_VERSION = 1
+SCHEMA_VERSION_HEADER = "x-schema-version"
+
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+JSON_CONTENT_TYPE = "application/json"
+
+
+class Envelope(NamedTuple):
+    """Cuerpo y propiedades AMQP de un mensaje listo para publicar."""
+
+    body: bytes
+    content_type: str
+    message_id: str
+    timestamp: datetime
+    headers: Dict[str, Any]
+
+
+def encode_message(message: Dict[str, Any]) -> Envelope:
+    return Envelope(
+        body=msgpack.packb(message),
+        content_type=MSGPACK_CONTENT_TYPE,
+        message_id=uuid.uuid4().hex,
+        timestamp=datetime.now(timezone.utc),
+        headers={SCHEMA_VERSION_HEADER: SCHEMA_VERSION},
+    )
+
+
+def decode_message(
+    body: bytes,
+    content_type: str | None = None,
+    headers: Dict[str, Any] | None = None,
+) -> QueuedNotificationEvent:
+    """
+    Decodifica el cuerpo de un mensaje directamente al modelo de su event_type.
+    Los mensajes sin content type ni version son los JSON que se publicaban
+    antes del envelope y se siguen aceptando.
+    """
+    version = int((headers or {}).get(SCHEMA_VERSION_HEADER, 1))
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Version de schema no soportada: {version}")
+
+    if content_type == MSGPACK_CONTENT_TYPE:
+        return notification_event_adapter.validate_python(msgpack.unpackb(body))
+    return notification_event_adapter.validate_json(body)
@@ -0,0 +1,29 @@
+from typing import List, Tuple
+from app.core.config import settings
+from app.schemas.notification_schemas import NotificationEventType
+
+
+def queue_for_event(event_type: str) -> str:
+    """
+    Los fan-out de curso van a la cola masiva, las notificaciones
+    transaccionales (un solo usuario, docente auxiliar) a la principal.
+    """
+    if event_type in (NotificationEventType.COURSE, NotificationEventType.COURSE_CHUNK):
+        return settings.RABBITMQ_BULK_QUEUE
+    return settings.RABBITMQ_QUEUE
+
+
+def weighted_queues() -> List[Tuple[str, int]]:
+    return [
+        (settings.RABBITMQ_QUEUE, settings.TRANSACTIONAL_QUEUE_WEIGHT),
+        (settings.RABBITMQ_BULK_QUEUE, settings.BULK_QUEUE_WEIGHT),
+    ]
+
+
+def split_by_weight(total: int, weights: List[int]) -> List[int]:
+    """
+    Reparte `total` (prefetch o concurrencia) proporcionalmente a los pesos.
+    Cada cola recibe al menos 1 para que ninguna quede sin consumir.
+    """
+    weight_sum = sum(weights)
+    return [max(1, round(total * weight / weight_sum)) for weight in weights]
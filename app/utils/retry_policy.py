@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Tuple
+from app.core.config import settings
+
+# Header con la cantidad de reintentos que ya tuvo un mensaje
+RETRY_COUNT_HEADER = "x-retry-count"
+
+
+def retry_queue_name(queue: str, attempt: int) -> str:
+    return f"{queue}.retry.{attempt}"
+
+
+def parking_queue_name(queue: str) -> str:
+    return f"{queue}.parking"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    """Backoff exponencial: RETRY_BASE_DELAY_MS * 2^(attempt - 1)."""
+    return settings.RETRY_BASE_DELAY_MS * 2 ** (attempt - 1)
+
+
+def retry_window_ms() -> int:
+    """Demora total de un mensaje que pasa por todos los reintentos."""
+    return sum(
+        retry_delay_ms(attempt) for attempt in range(1, settings.RETRY_MAX_ATTEMPTS + 1)
+    )
+
+
+def retry_queue_arguments(queue: str) -> Dict[str, Any]:
+    """
+    Argumentos de las colas de espera. Cada mensaje se publica con su propio
+    vencimiento (expiration) y al vencer el broker lo devuelve (dead-letter) a
+    la cola original, sin sleeps en el worker ni bloquear al consumidor.
+    El TTL no va en los argumentos para poder cambiar RETRY_BASE_DELAY_MS sin
+    que el redeclare de las colas durables falle con PRECONDITION_FAILED; hay
+    una cola por intento porque el broker solo vence mensajes al frente de la
+    cola y todos los de una misma cola esperan lo mismo.
+    """
+    return {
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": queue,
+    }
+
+
+def queue_declarations(queue: str) -> List[Tuple[str, Dict[str, Any] | None]]:
+    """
+    Colas (nombre, argumentos) que necesita una cola de trabajo: ella misma,
+    una de espera por intento y la de estacionamiento.
+    """
+    return [
+        (queue, None),
+        *(
+            (retry_queue_name(queue, attempt), retry_queue_arguments(queue))
+            for attempt in range(1, settings.RETRY_MAX_ATTEMPTS + 1)
+        ),
+        (parking_queue_name(queue), None),
+    ]
+
+
+def get_retry_count(headers: Dict[str, Any] | None) -> int:
+    return int((headers or {}).get(RETRY_COUNT_HEADER, 0))
+
+
+def next_retry_destination(
+    queue: str, headers: Dict[str, Any] | None
+) -> Tuple[str, Dict[str, Any], int | None]:
+    """
+    Devuelve (routing_key, headers, expiration_ms) a donde publicar un mensaje
+    que fallo: la cola de espera del siguiente intento con su demora, o la cola
+    de estacionamiento (sin vencimiento) si ya se agotaron los RETRY_MAX_ATTEMPTS.
+    """
+    attempt = get_retry_count(headers) + 1
+    new_headers = {**(headers or {}), RETRY_COUNT_HEADER: attempt}
+    if attempt > settings.RETRY_MAX_ATTEMPTS:
+        return parking_queue_name(queue), new_headers, None
+    return retry_queue_name(queue, attempt), new_headers, retry_delay_ms(attempt)
@@ -0,0 +1,81 @@
+import time
+from typing import Callable
+import logging
+
+
+class AckBatcher:
+    """
+    Agrupa los acks de un canal y los envia con multiple=True.
+
+    Un ack multiple confirma todos los delivery tags menores o iguales, por eso
+    solo se envia hasta el mayor tag cuyos anteriores ya terminaron de
+    procesarse. Los mensajes que terminan fuera de orden esperan a que se
+    complete el prefijo o a que venza el intervalo, en cuyo caso se confirman
+    de a uno para no retenerlos detras de un mensaje lento.
+
+    No es thread safe: todos los metodos se llaman desde el event loop del
+    worker, nunca desde los threads donde corren los envios.
+    """
+
+    def __init__(
+        self,
+        ack: Callable[[int, bool], None],
+        max_batch: int,
+        max_delay: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ack = ack
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._clock = clock
+        self._pending: set[int] = set()  # Entregados, procesandose
+        self._completed: set[int] = set()  # Procesados, sin ack
+        self._oldest_completed_at: float | None = None
+
+    def delivered(self, delivery_tag: int):
+        self._pending.add(delivery_tag)
+
+    def completed(self, delivery_tag: int):
+        self._pending.discard(delivery_tag)
+        self._completed.add(delivery_tag)
+        if self._oldest_completed_at is None:
+            self._oldest_completed_at = self._clock()
+
+        if len(self._completed) >= self._max_batch:
+            self.flush()
+
+    def discard(self, delivery_tag: int):
+        """El mensaje se resolvio por otro medio (nack), no se le hace ack."""
+        self._pending.discard(delivery_tag)
+
+    def tick(self):
+        """Envia los acks pendientes si el mas viejo supero el intervalo."""
+        if (
+            self._oldest_completed_at is not None
+            and self._clock() - self._oldest_completed_at >= self._max_delay
+        ):
+            self.flush(force=True)
+
+    def flush(self, force: bool = False):
+        if not self._completed:
+            return
+
+        lowest_pending = min(self._pending) if self._pending else None
+        contiguous = [
+            tag
+            for tag in self._completed
+            if lowest_pending is None or tag < lowest_pending
+        ]
+        if contiguous:
+            last_tag = max(contiguous)
+            self._ack(last_tag, True)
+            self._completed.difference_update(contiguous)
+            logging.debug(f"Ack multiple hasta delivery tag {last_tag}")
+
+        if force:
+            # Los que terminaron detras de un mensaje lento se confirman de a uno
+            for tag in sorted(self._completed):
+                self._ack(tag, False)
+            self._completed.clear()
+
+        self._oldest_completed_at = self._clock() if self._completed else None
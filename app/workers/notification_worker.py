@@ -1,39 +1,307 @@
 import asyncio
-import time
-from app.services.notification_processor import process_message
+import os
+import signal
+from aio_pika.abc import AbstractIncomingMessage
+from app.services.notification_processor import (
+    process_message,
+    purge_processed_chunks,
+    shutdown_fanout_executor,
+)
 from app.core.config import settings
-from app.repositories.queue_repository import QueueRepository
+from app.core.auth import get_service_auth
+from app.core.http_clients import open_http_clients, close_http_clients
+from app.repositories.queue_backend import QueueBackend, create_queue_backend
+from app.repositories.queue_publisher import get_queue_publisher
+from app.services.courses_service import (
+    get_roster_cache,
+    on_course_users_invalidated,
+)
+from app.services.user_service import get_user_info_cache
+from app.utils.queue_routing import split_by_weight, weighted_queues
+from app.utils.retry_policy import RETRY_COUNT_HEADER, next_retry_destination
+from app.workers.ack_batcher import AckBatcher
 import logging
+from typing import Any, Dict
 
+# Tiempo maximo de espera para terminar los mensajes en proceso al detenerse
+SHUTDOWN_TIMEOUT = 30
 
-def callback(ch, method, properties, body):
-    loop = asyncio.new_event_loop()  # pika usa callbacks sincronos.
-    asyncio.set_event_loop(loop)
+
+class QueueConsumer:
+    """
+    Consume una cola con su propia porcion de prefetch y de concurrencia.
+
+    Cada mensaje se procesa en su propia tarea y se confirma con acks agrupados
+    al terminar de procesarlo.
+    """
+
+    def __init__(
+        self,
+        queue_repo: QueueBackend,
+        queue: str,
+        prefetch_count: int,
+        concurrency: int,
+    ):
+        self.queue = queue
+        self.prefetch_count = prefetch_count
+        self.concurrency = concurrency
+        self._queue_repo = queue_repo
+        self._in_flight = asyncio.Semaphore(concurrency)
+        self._consumer_tag: str | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._processing: set[asyncio.Task] = set()
+        self._ack_tasks: set[asyncio.Task] = set()
+        self._ack_batcher, self._messages = self._create_ack_batcher()
+
+    def _create_ack_batcher(
+        self,
+    ) -> tuple[AckBatcher, dict[int, AbstractIncomingMessage]]:
+        # Los delivery tags son por canal: si el canal se reabre se arranca un
+        # batcher nuevo y los mensajes del canal anterior los reentrega el broker.
+        messages: dict[int, AbstractIncomingMessage] = {}
+
+        def ack(delivery_tag: int, multiple: bool):
+            message = messages[delivery_tag]
+            acked = (
+                [tag for tag in messages if tag <= delivery_tag]
+                if multiple
+                else [delivery_tag]
+            )
+            for tag in acked:
+                del messages[tag]
+            task = asyncio.create_task(message.ack(multiple=multiple))
+            self._ack_tasks.add(task)
+            task.add_done_callback(self._on_ack_done)
+
+        # Sin ack el broker no entrega mas alla del prefetch: si el lote no entra
+        # en lo que queda de la ventana fuera de los mensajes en proceso, la cola
+        # se frena hasta que vence ACK_BATCH_INTERVAL
+        batcher = AckBatcher(
+            ack,
+            max_batch=min(
+                settings.ACK_BATCH_SIZE,
+                max(1, self.prefetch_count - self.concurrency),
+            ),
+            max_delay=settings.ACK_BATCH_INTERVAL,
+        )
+        return batcher, messages
+
+    def _on_ack_done(self, task: asyncio.Task):
+        self._ack_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.warning(f"No se pudo enviar el ack: {task.exception()}")
+
+    def _on_channel_closed(self, *args):
+        logging.warning("Canal de RabbitMQ cerrado, descartando acks pendientes")
+        self._ack_batcher, self._messages = self._create_ack_batcher()
+
+    async def on_message(self, message: AbstractIncomingMessage):
+        ack_batcher, messages = self._ack_batcher, self._messages
+        messages[message.delivery_tag] = message
+        ack_batcher.delivered(message.delivery_tag)
+        self._processing.add(asyncio.current_task())
+        try:
+            async with self._in_flight:
+                if not await process_message(
+                    message.body,
+                    message.content_type,
+                    message.headers,
+                    message.message_id,
+                ):
+                    await self._retry_later(message)
+        except Exception as e:
+            # No se pudo derivar el mensaje, se devuelve a la cola sin ack
+            logging.error(f"Error al reintentar el mensaje: {str(e)}")
+            ack_batcher.discard(message.delivery_tag)
+            messages.pop(message.delivery_tag, None)
+            await message.nack(requeue=True)
+            return
+        finally:
+            self._processing.discard(asyncio.current_task())
+        ack_batcher.completed(message.delivery_tag)
+
+    async def _retry_later(self, message: AbstractIncomingMessage):
+        """
+        Publica el mensaje en la cola de espera del siguiente intento (o en la de
+        estacionamiento) y el original se confirma como procesado.
+        """
+        routing_key, headers, expiration_ms = next_retry_destination(
+            self.queue, message.headers
+        )
+        logging.warning(
+            f"Mensaje {message.delivery_tag} fallido, intento {headers[RETRY_COUNT_HEADER]}: derivado a {routing_key}"
+        )
+        await self._queue_repo.publish(
+            routing_key,
+            message.body,
+            headers,
+            content_type=message.content_type,
+            message_id=message.message_id,
+            timestamp=message.timestamp,
+            expiration_ms=expiration_ms,
+        )
+
+    async def _flush_acks_periodically(self):
+        while True:
+            await asyncio.sleep(settings.ACK_BATCH_INTERVAL)
+            self._ack_batcher.tick()
+
+    async def start(self):
+        self._flush_task = asyncio.create_task(self._flush_acks_periodically())
+        self._consumer_tag = await self._queue_repo.consume(
+            self.queue,
+            self.on_message,
+            prefetch_count=self.prefetch_count,
+            on_channel_close=self._on_channel_closed,
+        )
+        logging.info(
+            f"Consumiendo {self.queue} con prefetch={self.prefetch_count} y concurrencia={self.concurrency}"
+        )
+
+    async def cancel(self):
+        if self._consumer_tag:
+            try:
+                await self._queue_repo.cancel(self._consumer_tag)
+            except Exception as e:
+                logging.warning(f"Error al cancelar el consumidor: {str(e)}")
+            self._consumer_tag = None
+
+    async def drain(self):
+        """Espera los mensajes en proceso y envia los acks pendientes."""
+        if self._processing:
+            await asyncio.wait(set(self._processing), timeout=SHUTDOWN_TIMEOUT)
+
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._ack_batcher.flush(force=True)
+        if self._ack_tasks:
+            await asyncio.wait(set(self._ack_tasks), timeout=SHUTDOWN_TIMEOUT)
+
+
+class NotificationWorker:
+    """
+    Consumidor asincrono de las colas de notificaciones. Corre en el event loop
+    de la aplicacion (lifespan de FastAPI) o en el de un proceso worker dedicado.
+
+    El prefetch y la concurrencia se reparten entre la cola transaccional y la
+    masiva segun sus pesos, asi un fan-out grande de curso no puede ocupar la
+    capacidad reservada para las notificaciones de un solo usuario.
+    """
+
+    def __init__(self, queue_repo: QueueBackend | None = None):
+        self._queue_repo = queue_repo or create_queue_backend()
+        queues = weighted_queues()
+        weights = [weight for _, weight in queues]
+        prefetch_counts = split_by_weight(settings.RABBITMQ_PREFETCH_COUNT, weights)
+        concurrencies = split_by_weight(settings.WORKER_CONCURRENCY, weights)
+        self._consumers = [
+            QueueConsumer(self._queue_repo, queue, prefetch_count, concurrency)
+            for (queue, _), prefetch_count, concurrency in zip(
+                queues, prefetch_counts, concurrencies
+            )
+        ]
+        self._invalidation_tag: str | None = None
+        self._stats_task: asyncio.Task | None = None
+
+    async def _connect(self):
+        for i in range(10):
+            try:
+                logging.info(f"Intentando conectar a RabbitMQ {1+i}/10")
+                await self._queue_repo.connect()
+                logging.info(f"Conexion a RabbitMQ exitosa")
+                return
+            except Exception:
+                logging.error(f"Error al conectar a RabbitMQ {1+i}/10")
+                if i == 9:
+                    raise
+                await asyncio.sleep(3)
+
+    async def start(self):
+        logging.info("Iniciando worker para procesar notificaciones")
+        await self._connect()
+        # Cada proceso worker aplica las invalidaciones a su propia cache
+        self._invalidation_tag = await self._queue_repo.subscribe(
+            settings.RABBITMQ_INVALIDATION_EXCHANGE, on_course_users_invalidated
+        )
+        for consumer in self._consumers:
+            await consumer.start()
+        if settings.CACHE_STATS_LOG_INTERVAL > 0:
+            self._stats_task = asyncio.create_task(self._log_cache_stats_periodically())
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Metricas de las caches que usa el procesamiento en este proceso."""
+        return {
+            "course_roster": get_roster_cache().stats(),
+            "user_info": get_user_info_cache().stats(),
+        }
+
+    async def _log_cache_stats_periodically(self):
+        # Las caches viven en cada proceso worker: el endpoint /metrics/cache del
+        # servidor web no las ve cuando los workers corren aparte
+        while True:
+            await asyncio.sleep(settings.CACHE_STATS_LOG_INTERVAL)
+            for name, stats in self.cache_stats().items():
+                logging.info(
+                    f"Cache {name} del worker {os.getpid()}: hit_ratio={stats['hit_ratio']:.2f} "
+                    f"hits={stats['hits']} misses={stats['misses']} size={stats['size']} "
+                    f"evictions={stats['evictions']}"
+                )
+
+    async def stop(self):
+        logging.info("Deteniendo worker de notificaciones")
+        if self._stats_task:
+            self._stats_task.cancel()
+            self._stats_task = None
+        if self._invalidation_tag:
+            try:
+                await self._queue_repo.cancel(self._invalidation_tag)
+            except Exception as e:
+                logging.warning(f"Error al cancelar la suscripcion: {str(e)}")
+            self._invalidation_tag = None
+        for consumer in self._consumers:
+            await consumer.cancel()
+        for consumer in self._consumers:
+            await consumer.drain()
+        await self._queue_repo.close()
+
+
+async def run_worker():
+    """Consume hasta recibir SIGTERM/SIGINT y luego se detiene ordenadamente."""
+    worker = NotificationWorker()
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # Los procesos worker pueden correr sin el relay del outbox: limpian al
+    # arrancar las marcas de bloques procesados que ya vencieron
     try:
-        loop.run_until_complete(process_message(body))
-    finally:
-        loop.close()
+        deleted = await asyncio.to_thread(purge_processed_chunks)
+        logging.info(f"{deleted} marcas de bloques procesados borradas")
+    except Exception as e:
+        logging.error(f"Error al borrar bloques procesados: {str(e)}")
+
+    # Clientes HTTP compartidos por todos los mensajes que procesa el proceso
+    open_http_clients()
+    # Token de servicio propio del proceso, antes del primer pedido al auth service
+    await get_service_auth().initialize()
+    # Los fan-out de curso grandes se vuelven a encolar divididos en bloques
+    publisher = get_queue_publisher()
+    try:
+        await publisher.connect()
+    except Exception:
+        logging.warning("Publicador de RabbitMQ no disponible al iniciar")
+        publisher.start_reconnecting()
+
+    await worker.start()
+    await stop_event.wait()
+    await worker.stop()
+    await publisher.close()
+    await close_http_clients()
+    shutdown_fanout_executor()
 
 
 def worker_main():
-    logging.info("Iniciando worker para procesar notificaciones")
-    for i in range(10):
-        try:
-            logging.info(f"Intentando conectar a RabbitMQ {1+i}/10")
-            queue_repo = QueueRepository()
-            logging.info(f"Conexion a RabbitMQ exitosa")
-            break
-        except Exception:
-            logging.error(f"Error al conectar a RabbitMQ {1+i}/10")
-            if i == 9:
-                raise
-            time.sleep(3)
-
-    logging.info("Conectado a RabbitMQ, escuchando mensajes en la queue")
-    channel = queue_repo._channel
-
-    channel.basic_consume(
-        queue=settings.RABBITMQ_QUEUE, on_message_callback=callback, auto_ack=True
-    )
-
-    channel.start_consuming()
+    """Punto de entrada sincronico, usado por los procesos de worker_pool."""
+    asyncio.run(run_worker())
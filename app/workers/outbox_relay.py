@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.repositories.outbox_repository import delete_messages, get_pending_messages
+from app.repositories.processed_chunk_repository import delete_chunks_processed_before
+from app.repositories.queue_publisher import QueuePublisher, get_queue_publisher
+from app.services.notification_processor import processed_chunks_cutoff
+import logging
+
+
+async def relay_outbox_batch(publisher: QueuePublisher, db: Session) -> int:
+    """
+    Publica un lote del outbox y borra los mensajes confirmados por el broker.
+    Los que fallan quedan para la proxima pasada. Devuelve cuantos se publicaron.
+    """
+    pending = await asyncio.to_thread(
+        get_pending_messages, db, settings.OUTBOX_BATCH_SIZE
+    )
+    published = []
+    try:
+        if pending:
+            errors = await publisher.send_batch(
+                [json.loads(message.payload) for message in pending]
+            )
+            published = [
+                message.id for message, error in zip(pending, errors) if error is None
+            ]
+    except HTTPException as e:
+        logging.warning(f"No se pudo vaciar el outbox: {e.detail}")
+
+    if published:
+        await asyncio.to_thread(delete_messages, db, published)
+    else:
+        # Libera los locks de las filas tomadas
+        await asyncio.to_thread(db.rollback)
+    return len(published)
+
+
+class OutboxRelay:
+    """
+    Tarea de fondo que reenvia a RabbitMQ los mensajes que se guardaron en el
+    outbox mientras el broker no estaba disponible. Cada
+    PROCESSED_CHUNK_PURGE_INTERVAL tambien borra las marcas de bloques de curso
+    procesados que ya no pueden volver a entregarse.
+    """
+
+    def __init__(
+        self,
+        publisher: QueuePublisher | None = None,
+        session_factory=SessionLocal,
+    ):
+        self._publisher = publisher or get_queue_publisher()
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        last_purge = None
+        while True:
+            await asyncio.sleep(settings.OUTBOX_RELAY_INTERVAL)
+            now = time.monotonic()
+            if (
+                last_purge is None
+                or now - last_purge >= settings.PROCESSED_CHUNK_PURGE_INTERVAL
+            ):
+                last_purge = now
+                await self.purge_processed_chunks()
+            if not self._publisher.is_connected():
+                continue
+            try:
+                await self.drain()
+            except Exception as e:
+                logging.error(f"Error al reenviar el outbox: {str(e)}")
+
+    async def drain(self):
+        """Publica lotes completos hasta vaciar el outbox."""
+        db = self._session_factory()
+        try:
+            total = 0
+            while True:
+                published = await relay_outbox_batch(self._publisher, db)
+                total += published
+                if published < settings.OUTBOX_BATCH_SIZE:
+                    break
+            if total:
+                logging.info(f"Outbox: {total} mensajes reenviados a RabbitMQ")
+        finally:
+            db.close()
+
+    async def purge_processed_chunks(self):
+        db = self._session_factory()
+        try:
+            deleted = await asyncio.to_thread(
+                delete_chunks_processed_before, db, processed_chunks_cutoff()
+            )
+            if deleted:
+                logging.info(f"{deleted} marcas de bloques procesados borradas")
+        except Exception as e:
+            logging.error(f"Error al borrar bloques procesados: {str(e)}")
+        finally:
+            db.close()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        logging.info("Relay del outbox iniciado")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
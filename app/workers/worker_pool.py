@@ -0,0 +1,93 @@
+import multiprocessing
+import signal
+import time
+import traceback
+from app.core.config import settings
+import logging
+
+# Tiempo de espera antes de relanzar un proceso worker que termino
+RESTART_DELAY = 3
+
+
+def run_worker_process(index: int):
+    """
+    Punto de entrada de cada proceso. Se importa el worker dentro del proceso
+    para que la conexion a RabbitMQ y el event loop sean propios de cada uno.
+    """
+    from app.workers.notification_worker import worker_main
+
+    logging.info(f"Proceso worker {index} iniciado")
+    try:
+        worker_main()
+    except Exception as e:
+        logging.error(f"Proceso worker {index} termino con error: {str(e)}")
+        logging.error(traceback.format_exc())
+        raise
+
+
+def create_tables():
+    from app.db.base import Base
+    from app.db.session import engine
+    import app.models.user  # noqa: F401
+    import app.models.notification_log  # noqa: F401
+    import app.models.outbox_message  # noqa: F401
+    import app.models.processed_chunk  # noqa: F401
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        logging.info("Tablas creadas correctamente en la base de datos")
+    except Exception as e:
+        logging.error(f"Error al crear tablas en la base de datos: {str(e)}")
+
+
+def main():
+    """
+    Lanza WORKER_PROCESSES procesos consumidores, cada uno con su propia
+    conexion, y los relanza si alguno termina.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    processes: dict[int, multiprocessing.Process] = {}
+    running = True
+
+    def start(index: int):
+        process = ctx.Process(
+            target=run_worker_process,
+            args=(index,),
+            name=f"notification-worker-{index}",
+        )
+        process.start()
+        processes[index] = process
+
+    def stop(signum, frame):
+        nonlocal running
+        logging.info(f"Señal {signum} recibida, deteniendo procesos worker")
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    create_tables()
+
+    logging.info(f"Iniciando {settings.WORKER_PROCESSES} procesos worker")
+    for index in range(settings.WORKER_PROCESSES):
+        start(index)
+
+    while running:
+        time.sleep(1)
+        for index, process in list(processes.items()):
+            if running and not process.is_alive():
+                logging.warning(
+                    f"Proceso worker {index} termino (exit code {process.exitcode}), relanzando..."
+                )
+                time.sleep(RESTART_DELAY)
+                start(index)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join(timeout=10)
+    logging.info("Procesos worker detenidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,10 @@ if [ "$1" = "test" ]; then
 elif [ "$1" = "app" ]; then
     echo "Iniciando la aplicación..."
     uvicorn app.main:app --host $HOST --port $PORT
+elif [ "$1" = "worker" ]; then
+    echo "Iniciando procesos worker..."
+    python -m app.workers.worker_pool
 else
-    echo "Uso: /entrypoint.sh [test|app]"
+    echo "Uso: /entrypoint.sh [test|app|worker]"
     exit 1
 fi
\ No newline at end of file
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Mide el throughput del pipeline publicador -> cola -> worker -> process_message
+usando el backend de colas en memoria, sin RabbitMQ.
+
+Solo se reemplaza lo externo: el auth service devuelve un usuario fijo, el
+envio de email/push duerme --send-latency-ms y la base es un SQLite temporal
+(un archivo, para que cada thread de envio use su propia conexion).
+
+Uso (desde la raiz del repo, con el .env cargado):
+    python -m scripts.benchmark_pipeline --messages 2000 --send-latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+import app.models.user  # noqa: F401
+import app.models.notification_log  # noqa: F401
+from app.repositories.in_memory_queue_backend import InMemoryQueueBackend
+from app.repositories.queue_publisher import QueuePublisher
+from app.workers.notification_worker import NotificationWorker
+
+
+def build_message(index: int):
+    return {
+        "event_type": "user_notification",
+        "id_user": index % 500 + 1,
+        "notification_type": "Tarea",
+        "event": "Entregado",
+        "data": {"titulo": f"Tarea {index}", "fecha": "2024-03-20", "nota": 8},
+    }
+
+
+async def run(messages: int, send_latency: float, db_path: str):
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+
+    @event.listens_for(engine, "connect")
+    def sqlite_pragmas(dbapi_connection, connection_record):
+        # Sin fsync por commit: se mide el pipeline, no el disco
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+    Base.metadata.create_all(bind=engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async def fake_get_info_user(user_id):
+        return {"id": user_id, "email": f"user{user_id}@test.com", "name": "Test"}
+
+    def fake_send(*args, **kwargs):
+        time.sleep(send_latency)
+
+    backend = InMemoryQueueBackend()
+    publisher = QueuePublisher(backend)
+    worker = NotificationWorker(backend)
+
+    with patch(
+        "app.services.notification_processor.SessionLocal", session_local
+    ), patch(
+        "app.services.notification_processor.get_info_user", fake_get_info_user
+    ), patch(
+        "app.services.notification_processor.send_email", fake_send
+    ), patch(
+        "app.services.notification_processor.send_push_notification", fake_send
+    ):
+        await publisher.connect()
+        await worker.start()
+
+        start = time.perf_counter()
+        errors = await publisher.send_batch([build_message(i) for i in range(messages)])
+        published = time.perf_counter() - start
+        await backend.wait_idle(poll_interval=0.001)
+        elapsed = time.perf_counter() - start
+
+        await worker.stop()
+
+    failed = sum(1 for error in errors if error is not None)
+    print(f"Mensajes: {messages} (fallidos al publicar: {failed})")
+    print(f"Publicacion: {published:.3f}s ({messages / published:.0f} msg/s)")
+    print(f"Procesamiento completo: {elapsed:.3f}s ({messages / elapsed:.0f} msg/s)")
+    print(f"Estacionados: {backend.queue_length('notification.parking')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--send-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "benchmark.db")
+        asyncio.run(run(args.messages, args.send_latency_ms / 1000, db_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,14 @@ from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.db.base import Base
 from app.db.dependencies import get_db
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.courses_service import get_roster_cache
+from app.services.user_service import (
+    get_user_info_cache,
+    get_token_cache,
+    get_token_validation_counts,
+    get_jwks_client,
+)
 
 # Crear una base de datos en memoria para testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -18,6 +25,17 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Cada test arranca con las caches en memoria vacias"""
+    yield
+    get_roster_cache.cache_clear()
+    get_user_info_cache.cache_clear()
+    get_token_cache.cache_clear()
+    get_token_validation_counts.cache_clear()
+    get_jwks_client.cache_clear()
+
+
 @pytest.fixture(scope="function")
 def db_session():
     Base.metadata.create_all(bind=engine)
@@ -51,7 +69,7 @@ def mock_auth_service():
 
 @pytest.fixture(scope="function")
 def mock_courses_service():
-    with patch("app.services.notification_processor.get_course_users") as mock:
+    with patch("app.services.courses_service.get_course_users") as mock:
         yield mock
 
 
@@ -63,10 +81,10 @@ def mock_email_service():
 
 @pytest.fixture(scope="function")
 def mock_queue_repository():
-    with patch(
-        "app.controller.notification_controller.QueueRepository"
-    ) as mock1, patch("app.workers.notification_worker.QueueRepository") as mock2:
+    with patch("app.controller.notification_controller.get_queue_publisher") as mock:
         mock_instance = MagicMock()
-        mock1.return_value = mock_instance
-        mock2.return_value = mock_instance
+        mock_instance.send_message = AsyncMock()
+        mock_instance.send_batch = AsyncMock()
+        mock_instance.broadcast = AsyncMock()
+        mock.return_value = mock_instance
         yield mock_instance
@@ -0,0 +1,135 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from app.services.courses_service import (
+    get_course_users,
+    get_roster_cache,
+    invalidate_course_users,
+    iter_course_users,
+)
+from app.utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def courses_requests():
+    """Reemplaza el courses service y registra los requests recibidos"""
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "curso-123", "enrolled_users": [1, 2]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    with patch(
+        "app.services.courses_service.get_courses_client",
+        lambda: client,
+    ), patch("app.services.courses_service.settings.COURSES_SERVICE_URL", "http://c"):
+        yield requests
+
+
+@pytest.mark.asyncio
+async def test_get_course_users_uses_cache(courses_requests):
+    """Test que verifica que el listado de un curso se pide una sola vez mientras está en cache"""
+    assert await get_course_users("curso-123") == [1, 2]
+    assert await get_course_users("curso-123") == [1, 2]
+
+    assert len(courses_requests) == 1
+    assert get_roster_cache().stats()["hits"] == 1
+    assert get_roster_cache().stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_course_users_refetches(courses_requests):
+    """Test que verifica que después de invalidar el curso se vuelve a pedir el listado"""
+    await get_course_users("curso-123")
+
+    assert invalidate_course_users("curso-123") is True
+    assert invalidate_course_users("curso-123") is False
+    await get_course_users("curso-123")
+
+    assert len(courses_requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_course_users_paginated_endpoint():
+    """Test que verifica que con endpoint paginado el listado se pide de a una página"""
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        offset = int(request.url.params["offset"])
+        limit = int(request.url.params["limit"])
+        return httpx.Response(200, json=list(range(offset, min(offset + limit, 5))))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    with patch(
+        "app.services.courses_service.get_courses_client",
+        lambda: client,
+    ), patch(
+        "app.services.courses_service.settings.COURSES_SERVICE_URL", "http://c"
+    ), patch(
+        "app.services.courses_service.settings.COURSES_USERS_PAGE_PATH",
+        "/courses/{course_id}/users",
+    ):
+        pages = [page async for page in iter_course_users("curso-123", 2)]
+
+    assert pages == [[0, 1], [2, 3], [4]]
+    assert len(requests) == 3
+    assert requests[0].url.path == "/courses/curso-123/users"
+
+
+@pytest.mark.asyncio
+async def test_iter_course_users_without_paginated_endpoint(courses_requests):
+    """Test que verifica que sin endpoint paginado se pagina el listado completo del curso"""
+    with patch("app.services.courses_service.settings.COURSES_USERS_PAGE_PATH", None):
+        pages = [page async for page in iter_course_users("curso-123", 1)]
+
+    assert pages == [[1], [2]]
+    assert len(courses_requests) == 1
+
+
+def test_ttl_cache_expires_entries():
+    """Test que verifica que las entradas vencen pasado el TTL"""
+    cache = TTLCache(ttl=10)
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=100):
+        cache.set("curso-123", [1])
+        assert cache.get("curso-123") == [1]
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=111):
+        assert cache.get("curso-123") is None
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test que verifica que al llenarse se descarta la entrada usada hace más tiempo"""
+    cache = TTLCache(ttl=10, max_size=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hit_ratio"] == 2 / 3
+
+
+def test_ttl_cache_entry_ttl_overrides_default():
+    """Test que verifica que una entrada puede tener una vigencia menor a la default"""
+    cache = TTLCache(ttl=600)
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=100):
+        cache.set("corta", "x", ttl=60)
+        cache.set("larga", "y")
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=200):
+        assert cache.get("corta") is None
+        assert cache.get("larga") == "y"
+
+
+def test_ttl_cache_disabled_with_zero_ttl():
+    """Test que verifica que con TTL 0 no se guarda nada"""
+    cache = TTLCache(ttl=0)
+    cache.set("curso-123", [1])
+
+    assert cache.get("curso-123") is None
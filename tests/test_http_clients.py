@@ -0,0 +1,34 @@
+import pytest
+from unittest.mock import patch
+from app.core.http_clients import (
+    get_auth_client,
+    get_courses_client,
+    open_http_clients,
+    close_http_clients,
+)
+
+
+@pytest.mark.asyncio
+async def test_http_clients_are_shared():
+    """Test que verifica que cada servicio usa un único cliente hasta que se cierra"""
+    open_http_clients()
+    auth_client = get_auth_client()
+
+    assert get_auth_client() is auth_client
+    assert get_courses_client() is not auth_client
+
+    await close_http_clients()
+
+    assert auth_client.is_closed
+    assert get_auth_client() is not auth_client
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_http_clients_use_settings():
+    """Test que verifica que los clientes se crean con la configuración de settings"""
+    with patch("app.core.http_clients.settings.HTTP_TIMEOUT", 1.5):
+        client = get_courses_client()
+
+    assert client.timeout.read == 1.5
+    await close_http_clients()
@@ -0,0 +1,233 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.models.notification_log import NotificationLog
+from app.repositories.in_memory_queue_backend import InMemoryQueueBackend
+from app.repositories.queue_publisher import QueuePublisher
+from app.models.user import User
+from app.schemas.user_schema import UserInfo
+from app.services.courses_service import get_roster_cache
+from app.workers.notification_worker import NotificationWorker
+
+user_notification = {
+    "event_type": "user_notification",
+    "id_user": 1,
+    "notification_type": "Tarea",
+    "event": "Entregado",
+    "data": {"titulo": "Tarea 1", "fecha": "2024-03-20", "nota": 9.5},
+}
+
+user_info_data = {"id": 1, "email": "usuario@test.com", "name": "Usuario Test"}
+
+course_notification = {
+    "event_type": "course_notification",
+    "id_course": "curso-123",
+    "notification_type": "Tarea",
+    "event": "Nuevo",
+    "data": {"titulo": "Tarea 1", "fecha": "2024-03-20"},
+}
+
+
+async def fake_get_info_users(user_ids):
+    return {
+        user_id: UserInfo(id=user_id, email=f"usuario{user_id}@test.com", name="Test")
+        for user_id in user_ids
+    }
+
+
+@pytest.fixture
+def mock_send_email(db_session):
+    """Reemplaza solo lo externo (auth, email, push) y usa la base de test"""
+    with patch(
+        "app.services.notification_processor.SessionLocal", lambda: db_session
+    ), patch(
+        "app.services.notification_processor.get_info_user",
+        AsyncMock(return_value=user_info_data),
+    ), patch(
+        "app.services.notification_processor.send_email"
+    ) as send_email, patch(
+        "app.services.notification_processor.send_push_notification"
+    ), patch(
+        "app.workers.notification_worker.settings.ACK_BATCH_INTERVAL", 0.01
+    ), patch(
+        "app.utils.retry_policy.settings.RETRY_BASE_DELAY_MS", 10
+    ):
+        yield send_email
+
+
+async def run_pipeline(notifications):
+    backend = InMemoryQueueBackend()
+    publisher = QueuePublisher(backend)
+    worker = NotificationWorker(backend)
+    await publisher.connect()
+    await worker.start()
+
+    # Los bloques de los fan-out de curso se publican por el mismo backend
+    with patch(
+        "app.services.notification_processor.get_queue_publisher",
+        return_value=publisher,
+    ):
+        await publisher.send_batch(notifications)
+        await asyncio.wait_for(backend.wait_idle(), timeout=5)
+
+    await worker.stop()
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_processes_notification(mock_send_email, db_session):
+    """Test que verifica el flujo completo publicador -> cola -> worker -> process_message"""
+    await run_pipeline([user_notification])
+
+    mock_send_email.assert_called_once()
+    assert mock_send_email.call_args.args[0] == "usuario@test.com"
+    assert db_session.query(NotificationLog).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_retries_failed_notification(
+    mock_send_email, db_session
+):
+    """Test que verifica que un envío fallido vuelve por la cola de espera y se reintenta"""
+    mock_send_email.side_effect = [Exception("SMTP caído"), None]
+
+    backend = await run_pipeline([user_notification])
+
+    assert mock_send_email.call_count == 2
+    assert backend.queue_length("notification.parking") == 0
+    assert db_session.query(NotificationLog).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_push_error_does_not_resend_email(
+    mock_send_email, db_session
+):
+    """Test que verifica que si falla el push no se reintenta el mensaje ni se reenvía el email"""
+    db_session.add(User(id=1, tarea_email=True, tarea_push=True, token_fcm="fcm"))
+    db_session.commit()
+
+    with patch(
+        "app.services.notification_processor.send_push_notification",
+        side_effect=Exception("FCM caído"),
+    ) as send_push:
+        backend = await run_pipeline([user_notification])
+
+    mock_send_email.assert_called_once()
+    send_push.assert_called_once()
+    assert backend.queue_length("notification.parking") == 0
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_owner_error_does_not_resend_student(mock_send_email):
+    """Test que verifica que si falla el aviso al owner solo se reintenta ese aviso"""
+
+    async def get_info_user(user_id):
+        if user_id == 2:
+            raise Exception("Auth service caído")
+        return user_info_data
+
+    with patch(
+        "app.services.notification_processor.get_info_user", get_info_user
+    ), patch("app.utils.retry_policy.settings.RETRY_MAX_ATTEMPTS", 2):
+        backend = await run_pipeline([{**user_notification, "assessment_owner_id": 2}])
+
+    mock_send_email.assert_called_once()
+    assert backend.queue_length("notification.parking") == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_blocking_send_does_not_block_loop(mock_send_email):
+    """Test que verifica que un envío SMTP bloqueante no frena al event loop ni a los demás mensajes"""
+    mock_send_email.side_effect = lambda *args: time.sleep(0.2)
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    # Los mensajes se procesan en paralelo: la sesion de test no se puede
+    # compartir entre threads, asi que se reemplaza el acceso a la base
+    with patch(
+        "app.services.notification_processor.get_user_preferences",
+        lambda user_id: User(id=user_id, tarea_email=True),
+    ), patch("app.services.notification_processor.create_log"):
+        start = time.perf_counter()
+        await run_pipeline(
+            [{**user_notification, "id_user": user_id} for user_id in range(1, 6)]
+        )
+        elapsed = time.perf_counter() - start
+    heartbeat_task.cancel()
+
+    assert mock_send_email.call_count == 5
+    # Los envíos se solapan en lugar de sumarse (5 x 0.2s) y el loop sigue atendiendo
+    assert elapsed < 0.6
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_splits_course_in_chunks(mock_send_email):
+    """Test que verifica que un curso grande se reparte en bloques y cada alumno recibe una sola notificación"""
+    get_info_users = AsyncMock(side_effect=fake_get_info_users)
+    # Los bloques se procesan en paralelo: la sesion de test no se puede
+    # compartir entre threads, asi que se reemplaza el acceso a la base
+    with patch(
+        "app.services.notification_processor.get_users_preferences",
+        lambda user_ids: {
+            user_id: User(id=user_id, tarea_email=True) for user_id in user_ids
+        },
+    ), patch("app.services.notification_processor.create_log"), patch(
+        "app.services.notification_processor.claim_course_chunk",
+        return_value=True,
+    ), patch(
+        "app.services.notification_processor.save_processed_chunk"
+    ), patch(
+        "app.services.courses_service.get_course_users",
+        AsyncMock(return_value=list(range(1, 8))),
+    ), patch(
+        "app.services.notification_processor.get_info_users", get_info_users
+    ), patch(
+        "app.services.notification_processor.settings.COURSE_CHUNK_SIZE", 3
+    ):
+        await run_pipeline([course_notification])
+
+    recipients = sorted(call.args[0] for call in mock_send_email.call_args_list)
+    assert recipients == sorted(f"usuario{i}@test.com" for i in range(1, 8))
+    # Un llamado por bloque: [1, 2, 3], [4, 5, 6] y [7]
+    assert get_info_users.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_in_memory_pipeline_broadcasts_roster_invalidation():
+    """Test que verifica que la invalidación de un curso llega a cada worker suscripto"""
+    backend = InMemoryQueueBackend()
+    publisher = QueuePublisher(backend)
+    worker = NotificationWorker(backend)
+    await publisher.connect()
+    await worker.start()
+    # Otro proceso suscripto al mismo exchange recibe su propia copia
+    received = []
+
+    async def other_process(body):
+        received.append(body)
+
+    await backend.subscribe("notification_invalidations", other_process)
+    roster_cache = get_roster_cache()
+    roster_cache.set("curso-123", [1, 2])
+
+    await publisher.broadcast("notification_invalidations", b"curso-123")
+    await asyncio.sleep(0)
+
+    assert roster_cache.get("curso-123") is None
+    assert received == [b"curso-123"]
+
+    await worker.stop()
+    roster_cache.set("curso-123", [1, 2])
+    await backend.broadcast("notification_invalidations", b"curso-123")
+    await asyncio.sleep(0)
+    # Al detenerse el worker deja de recibir invalidaciones
+    assert roster_cache.get("curso-123") == [1, 2]
+    roster_cache.invalidate("curso-123")
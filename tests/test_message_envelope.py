@@ -0,0 +1,98 @@
+import json
+import msgpack
+import pytest
+from typing import get_args
+from app.schemas.notification_schemas import (
+    INTERNAL_EVENT_MODELS,
+    CourseNotificationEvent,
+    NotificationEvent,
+    QueuedNotificationEvent,
+    UserNotificationEvent,
+    notification_event_adapter,
+)
+from app.utils.message_envelope import (
+    MSGPACK_CONTENT_TYPE,
+    SCHEMA_VERSION,
+    SCHEMA_VERSION_HEADER,
+    decode_message,
+    encode_message,
+)
+
+user_notification_data = {
+    "event_type": "user_notification",
+    "id_user": 1,
+    "notification_type": "Tarea",
+    "event": "Entregado",
+    "data": {"titulo": "Tarea 1", "fecha": "2024-03-20", "nota": 9.5},
+}
+
+
+def test_envelope_roundtrip_to_typed_model():
+    """Test que verifica que un mensaje codificado se decodifica al modelo de su evento"""
+    envelope = encode_message(user_notification_data)
+
+    assert envelope.content_type == MSGPACK_CONTENT_TYPE
+    assert envelope.headers == {SCHEMA_VERSION_HEADER: SCHEMA_VERSION}
+    assert envelope.message_id
+    assert len(envelope.body) < len(json.dumps(user_notification_data))
+
+    notification = decode_message(
+        envelope.body, envelope.content_type, envelope.headers
+    )
+    assert isinstance(notification, UserNotificationEvent)
+    assert notification.data.nota == 9.5
+
+
+def test_decode_legacy_json_message():
+    """Test que verifica que se siguen aceptando los mensajes JSON sin envelope"""
+    body = json.dumps(
+        {
+            "event_type": "course_notification",
+            "id_course": "curso-123",
+            "notification_type": "Tarea",
+            "event": "Nuevo",
+            "data": {"titulo": "Tarea 1", "fecha": "2024-03-20"},
+        }
+    ).encode("utf-8")
+
+    notification = decode_message(body)
+
+    assert isinstance(notification, CourseNotificationEvent)
+    assert notification.id_course == "curso-123"
+
+
+def test_decode_rejects_newer_schema_version():
+    """Test que verifica que no se interpreta un mensaje de una versión más nueva"""
+    body = msgpack.packb(user_notification_data)
+
+    with pytest.raises(ValueError):
+        decode_message(
+            body, MSGPACK_CONTENT_TYPE, {SCHEMA_VERSION_HEADER: SCHEMA_VERSION + 1}
+        )
+
+
+def test_decode_rejects_unknown_event_type():
+    """Test que verifica el rechazo de un event_type desconocido"""
+    body = msgpack.packb({"event_type": "invalid_type", "id_user": 1})
+
+    with pytest.raises(ValueError):
+        decode_message(body, MSGPACK_CONTENT_TYPE)
+
+
+def test_notification_event_adapter_picks_model_by_event_type():
+    """Test que verifica que el adapter valida los bytes JSON directo al modelo de su event_type"""
+    body = json.dumps(user_notification_data).encode("utf-8")
+
+    notification = notification_event_adapter.validate_json(body)
+
+    assert isinstance(notification, UserNotificationEvent)
+    with pytest.raises(ValueError):
+        notification_event_adapter.validate_json(b'{"event_type": "invalid_type"}')
+
+
+def test_queued_events_extend_api_events():
+    """Test que verifica que la cola acepta todos los eventos de la API mas los internos"""
+    api_models = get_args(get_args(NotificationEvent)[0])
+    queued_models = get_args(get_args(QueuedNotificationEvent)[0])
+
+    assert queued_models == api_models + INTERNAL_EVENT_MODELS
@@ -1,22 +1,44 @@
+import asyncio
+import threading
+import time
 import pytest
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi import HTTPException
 from app.services.notification_processor import (
     process_message,
     process_user_notification,
     process_course_notification,
+    process_course_chunk,
+    course_event_key,
+    course_chunk_id,
     process_aux_teacher_notification,
     send_notifications,
     should_notify,
     get_user_preferences,
+    get_users_preferences,
+    get_fanout_executor,
+    shutdown_fanout_executor,
 )
 from app.schemas.notification_schemas import (
     UserNotificationEvent,
     CourseNotificationEvent,
+    CourseChunkNotificationEvent,
     AuxiliaryTeacherNotificationEvent,
 )
+from app.schemas.user_schema import UserInfo
 from app.models.user import User
+from app.repositories.user_repository import get_users_by_ids
+from app.repositories.processed_chunk_repository import (
+    claim_chunk,
+    is_chunk_processed,
+    mark_chunk_processed,
+)
+from app.db.base import Base
+from app.models.processed_chunk import ProcessedChunk
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 
 # Datos de prueba para notificaciones de usuario
@@ -71,6 +93,24 @@ user_info_data = {
 }
 
 
+def users_preferences(user_ids):
+    return {
+        user_id: User(
+            id=user_id, tarea_email=True, tarea_push=True, token_fcm="fcm_token_123"
+        )
+        for user_id in user_ids
+    }
+
+
+def users_info(user_ids):
+    return {
+        user_id: UserInfo(
+            id=user_id, email=f"usuario{user_id}@test.com", name="Usuario Test"
+        )
+        for user_id in user_ids
+    }
+
+
 @pytest.fixture
 def mock_user_repository():
     with patch("app.services.notification_processor.get_user_by_id") as mock_get, patch(
@@ -85,9 +125,21 @@ def mock_user_service():
         yield mock
 
 
+@pytest.fixture
+def mock_users_preferences():
+    with patch("app.services.notification_processor.get_users_preferences") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_users_service():
+    with patch("app.services.notification_processor.get_info_users") as mock:
+        yield mock
+
+
 @pytest.fixture
 def mock_courses_service():
-    with patch("app.services.notification_processor.get_course_users") as mock:
+    with patch("app.services.courses_service.get_course_users") as mock:
         yield mock
 
 
@@ -196,6 +248,45 @@ def test_get_user_preferences_create_new_user(mock_user_repository):
     result = get_user_preferences(1)
     assert result == new_user
 
+
+def test_get_users_preferences_creates_missing_users(db_session):
+    """Test que verifica que get_users_preferences carga los existentes y crea los faltantes con valores default"""
+    db_session.add(User(id=1, tarea_email=False))
+    db_session.commit()
+
+    with patch("app.services.notification_processor.SessionLocal", lambda: db_session):
+        users = get_users_preferences([1, 2, 3, 2])
+
+    assert sorted(users) == [1, 2, 3]
+    assert users[1].tarea_email is False
+    assert users[2].tarea_email is True
+    assert db_session.query(User).count() == 3
+
+
+def test_get_users_preferences_ignores_concurrently_created_users(db_session):
+    """Test que verifica que el INSERT no falla si otro worker ya creó al usuario"""
+    real_get_users_by_ids = get_users_by_ids
+
+    def get_users_created_in_between(db, user_ids):
+        users = real_get_users_by_ids(db, user_ids)
+        if not db.get(User, 2):
+            # Otro worker crea al usuario entre la consulta y el INSERT
+            db.add(User(id=2, examen_push=False))
+            db.commit()
+            return {}
+        return users
+
+    with patch(
+        "app.services.notification_processor.SessionLocal", lambda: db_session
+    ), patch(
+        "app.services.notification_processor.get_users_by_ids",
+        side_effect=get_users_created_in_between,
+    ):
+        users = get_users_preferences([1, 2])
+
+    assert sorted(users) == [1, 2]
+    assert users[2].examen_push is False
+
 @pytest.mark.asyncio
 async def test_send_notifications_aux_teacher_always_sends(
     mock_email_service, mock_push_service, mock_log_repository, mock_session_local
@@ -313,23 +404,109 @@ async def test_process_user_notification_user_info_error(
 
 
 @pytest.mark.asyncio
-async def test_process_course_notification_success(
-    mock_courses_service,
-    mock_user_service,
+async def test_process_user_notification_push_error_is_not_retried(
     mock_user_repository,
+    mock_user_service,
     mock_format_notification,
     mock_email_service,
     mock_push_service,
     mock_log_repository,
     mock_session_local,
 ):
-    """Test que verifica el procesamiento exitoso de notificación de curso"""
-    user_list = [1, 2, 3]
-    mock_courses_service.return_value = user_list
+    """Test que verifica que si el email salió un error de push no marca el mensaje para reintentar"""
+    user = User(id=1, tarea_email=True, tarea_push=True, token_fcm="fcm_token_123")
+    mock_user_repository["get"].return_value = user
     mock_user_service.return_value = user_info_data
+    mock_push_service.side_effect = Exception("FCM caído")
+
+    await process_user_notification(UserNotificationEvent(**user_notification_data))
+
+    mock_email_service.assert_called_once()
+
 
+@pytest.mark.asyncio
+async def test_process_user_notification_all_sends_failed(
+    mock_user_repository,
+    mock_user_service,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+):
+    """Test que verifica que se reintenta si no salió ningún envío"""
     user = User(id=1, tarea_email=True, tarea_push=True, token_fcm="fcm_token_123")
     mock_user_repository["get"].return_value = user
+    mock_user_service.return_value = user_info_data
+    mock_email_service.side_effect = Exception("SMTP caído")
+    mock_push_service.side_effect = Exception("FCM caído")
+
+    with pytest.raises(HTTPException):
+        await process_user_notification(UserNotificationEvent(**user_notification_data))
+
+
+@pytest.mark.asyncio
+async def test_process_user_notification_queues_owner_notification(
+    mock_user_repository,
+    mock_user_service,
+    mock_format_notification,
+    mock_email_service,
+    mock_log_repository,
+    mock_session_local,
+    mock_chunk_publisher,
+):
+    """Test que verifica que el aviso al owner se encola como un mensaje aparte"""
+    mock_user_repository["get"].return_value = User(id=1, tarea_email=True)
+    mock_user_service.return_value = user_info_data
+
+    await process_user_notification(
+        UserNotificationEvent(**user_notification_data, assessment_owner_id=2)
+    )
+
+    mock_email_service.assert_called_once()
+    message = mock_chunk_publisher.send_message.call_args.args[0]
+    assert message["event_type"] == "assessment_owner_notification"
+    assert message["assessment_owner_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_process_user_notification_owner_to_outbox_without_queue(
+    mock_user_repository,
+    mock_user_service,
+    mock_format_notification,
+    mock_email_service,
+    mock_log_repository,
+    mock_session_local,
+    mock_chunk_publisher,
+):
+    """Test que verifica que si la cola no está disponible el aviso al owner va al outbox"""
+    mock_user_repository["get"].return_value = User(id=1, tarea_email=True)
+    mock_user_service.return_value = user_info_data
+    mock_chunk_publisher.send_message.side_effect = HTTPException(status_code=503)
+
+    with patch("app.services.notification_processor.save_to_outbox") as mock_outbox:
+        await process_user_notification(
+            UserNotificationEvent(**user_notification_data, assessment_owner_id=2)
+        )
+
+    messages = mock_outbox.call_args.args[0]
+    assert messages[0]["event_type"] == "assessment_owner_notification"
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_success(
+    mock_courses_service,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+    mock_session_local,
+):
+    """Test que verifica el procesamiento exitoso de notificación de curso"""
+    user_list = [1, 2, 3]
+    mock_courses_service.return_value = user_list
+    mock_users_service.return_value = users_info(user_list)
+    mock_users_preferences.return_value = users_preferences(user_list)
 
     notification = CourseNotificationEvent(**course_notification_data)
 
@@ -337,9 +514,17 @@ async def test_process_course_notification_success(
 
     # Verificar que se obtuvieron los usuarios del curso
     mock_courses_service.assert_called_once_with("curso-123")
-    # Verificar que se proceso cada usuario
-    assert mock_user_service.call_count == 3
-    assert mock_format_notification.call_count == 3
+    # Verificar que la información y las preferencias se pidieron en un solo llamado
+    mock_users_service.assert_called_once_with(user_list)
+    mock_users_preferences.assert_called_once_with(user_list)
+    # Verificar que el contenido se armó una sola vez y se envió a cada usuario
+    mock_format_notification.assert_called_once()
+    assert mock_email_service.call_count == 3
+    assert mock_email_service.call_args_list[0].args == (
+        "usuario1@test.com",
+        "Asunto de prueba",
+        "Cuerpo de prueba",
+    )
 
 
 @pytest.mark.asyncio
@@ -358,27 +543,426 @@ async def test_process_course_notification_no_users(mock_courses_service):
 @pytest.mark.asyncio
 async def test_process_course_notification_user_info_error_continues(
     mock_courses_service,
-    mock_user_service,
-    mock_user_repository,
+    mock_users_service,
+    mock_users_preferences,
     mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+    mock_session_local,
 ):
     """Test que verifica que continúa procesando otros usuarios si falla uno"""
     user_list = [1, 2, 3]
     mock_courses_service.return_value = user_list
-    mock_user_service.side_effect = [Exception("Error"), user_info_data, user_info_data]
-
-    user = User(id=1, tarea_email=True, tarea_push=True, token_fcm="fcm_token_123")
-    mock_user_repository["get"].return_value = user
+    # El usuario 1 no se pudo obtener del auth service
+    mock_users_service.return_value = users_info([2, 3])
+    mock_users_preferences.return_value = users_preferences(user_list)
 
     notification = CourseNotificationEvent(**course_notification_data)
 
     # No debería lanzar excepción, debería continuar con los otros usuarios
     await process_course_notification(notification)
 
-    # Verificar que se intentó procesar todos los usuarios
-    assert mock_user_service.call_count == 3
-    # Verificar que se formateó para los usuarios exitosos
-    assert mock_format_notification.call_count == 2
+    # Verificar que se notificó a los usuarios exitosos
+    recipients = [call.args[0] for call in mock_email_service.call_args_list]
+    assert sorted(recipients) == ["usuario2@test.com", "usuario3@test.com"]
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_bounded_concurrency(
+    mock_courses_service,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+    mock_session_local,
+):
+    """Test que verifica que el fan-out es concurrente pero no supera el límite"""
+    user_list = list(range(1, 11))
+    mock_courses_service.return_value = user_list
+    mock_users_service.return_value = users_info(user_list)
+    mock_users_preferences.return_value = users_preferences(user_list)
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def slow_send_email(*args):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    mock_email_service.side_effect = slow_send_email
+
+    notification = CourseNotificationEvent(**course_notification_data)
+
+    with patch(
+        "app.services.notification_processor.settings.COURSE_FANOUT_CONCURRENCY", 3
+    ):
+        await process_course_notification(notification)
+
+    assert mock_email_service.call_count == 10
+    assert max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_uses_fanout_executor(
+    mock_courses_service,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+    mock_session_local,
+):
+    """Test que verifica que los envíos del fan-out usan su propio pool, dimensionado con COURSE_FANOUT_CONCURRENCY"""
+    user_list = list(range(1, 7))
+    mock_courses_service.return_value = user_list
+    mock_users_service.return_value = users_info(user_list)
+    mock_users_preferences.return_value = users_preferences(user_list)
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    threads = set()
+
+    def slow_send_email(*args):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    mock_email_service.side_effect = slow_send_email
+
+    shutdown_fanout_executor()
+    with patch(
+        "app.services.notification_processor.settings.COURSE_FANOUT_CONCURRENCY", 2
+    ):
+        assert get_fanout_executor()._max_workers == 2
+        # Dos notificaciones de curso a la vez comparten el mismo pool
+        await asyncio.gather(
+            process_course_notification(
+                CourseNotificationEvent(**course_notification_data)
+            ),
+            process_course_notification(
+                CourseNotificationEvent(**course_notification_data)
+            ),
+        )
+    shutdown_fanout_executor()
+
+    assert mock_email_service.call_count == 12
+    assert max_in_flight == 2
+    assert all(name.startswith("course-fanout") for name in threads)
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_send_error_isolated(
+    mock_courses_service,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+    mock_session_local,
+):
+    """Test que verifica que un error inesperado con un destinatario no corta al resto"""
+    mock_courses_service.return_value = [1, 2, 3]
+    mock_users_service.return_value = users_info([1, 2, 3])
+    mock_users_preferences.return_value = users_preferences([1, 2, 3])
+
+    notification = CourseNotificationEvent(**course_notification_data)
+
+    with patch(
+        "app.services.notification_processor.send_notifications",
+        side_effect=[Exception("Error inesperado"), True, True],
+    ) as mock_send:
+        await process_course_notification(notification)
+
+    assert mock_send.call_count == 3
+
+
+@pytest.fixture
+def mock_chunk_publisher():
+    with patch(
+        "app.services.notification_processor.get_queue_publisher"
+    ) as mock, patch(
+        "app.services.notification_processor.settings.COURSE_CHUNK_SIZE", 2
+    ):
+        publisher = MagicMock()
+        publisher.send_message = AsyncMock(return_value=True)
+        mock.return_value = publisher
+        yield publisher
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_large_course_is_chunked(
+    mock_courses_service, mock_users_service, mock_chunk_publisher
+):
+    """Test que verifica que un curso grande se divide en bloques encolados en lugar de notificarse directamente"""
+    mock_courses_service.return_value = [5, 1, 2, 3, 4]
+
+    notification = CourseNotificationEvent(**course_notification_data)
+
+    await process_course_notification(notification, "mensaje-1")
+
+    mock_users_service.assert_not_called()
+    chunks = [call.args[0] for call in mock_chunk_publisher.send_message.call_args_list]
+    assert [chunk["recipients"] for chunk in chunks] == [[5, 1], [2, 3], [4]]
+    assert [chunk["chunk_id"] for chunk in chunks] == [
+        course_chunk_id("mensaje-1", [5, 1]),
+        course_chunk_id("mensaje-1", [2, 3]),
+        course_chunk_id("mensaje-1", [4]),
+    ]
+    assert all(chunk["event_type"] == "course_chunk_notification" for chunk in chunks)
+    assert chunks[0]["data"]["titulo"] == "Tarea 1"
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_roster_change_renames_chunks(
+    mock_courses_service, mock_chunk_publisher
+):
+    """Test que verifica que si el listado cambia entre reintentos las páginas corridas son bloques nuevos"""
+    notification = CourseNotificationEvent(**course_notification_data)
+    mock_courses_service.return_value = [1, 2, 3, 4]
+    await process_course_notification(notification, "mensaje-1")
+    # Se inscribe el alumno 0 en el medio y las paginas siguientes se corren
+    mock_courses_service.return_value = [1, 2, 0, 3, 4]
+    await process_course_notification(notification, "mensaje-1")
+
+    chunks = [call.args[0] for call in mock_chunk_publisher.send_message.call_args_list]
+    first, retry = chunks[:2], chunks[2:]
+    assert [chunk["recipients"] for chunk in retry] == [[1, 2], [0, 3], [4]]
+    # Solo la pagina que no cambio conserva el chunk_id y se descarta
+    assert first[0]["chunk_id"] == retry[0]["chunk_id"]
+    assert first[1]["chunk_id"] not in {chunk["chunk_id"] for chunk in retry}
+    assert len({chunk["chunk_id"] for chunk in chunks}) == 4
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_chunk_publish_error(
+    mock_courses_service, mock_chunk_publisher
+):
+    """Test que verifica que si no se pueden encolar los bloques el evento se reintenta"""
+    mock_courses_service.return_value = [1, 2, 3]
+    mock_chunk_publisher.send_message.side_effect = [
+        True,
+        HTTPException(status_code=503),
+    ]
+
+    notification = CourseNotificationEvent(**course_notification_data)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await process_course_notification(notification, "mensaje-1")
+
+    assert exc_info.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_process_course_notification_publishes_chunks_while_fetching(
+    mock_chunk_publisher,
+):
+    """Test que verifica que cada bloque se publica apenas llega su página, antes de pedir las siguientes"""
+    events = []
+
+    async def fake_pages(course_id, page_size):
+        for page in ([1, 2], [3, 4], [5]):
+            events.append(f"pagina {page}")
+            yield page
+            await asyncio.sleep(0)
+
+    async def record_publish(message):
+        events.append(f"bloque {message['recipients']}")
+        return True
+
+    mock_chunk_publisher.send_message.side_effect = record_publish
+    notification = CourseNotificationEvent(**course_notification_data)
+
+    with patch("app.services.notification_processor.iter_course_users", fake_pages):
+        await process_course_notification(notification, "mensaje-1")
+
+    assert events.index("bloque [1, 2]") < events.index("pagina [5]")
+    assert mock_chunk_publisher.send_message.call_count == 3
+
+
+def test_course_event_key_is_deterministic():
+    """Test que verifica que el mismo evento sin message_id genera siempre la misma clave de bloques"""
+    notification = CourseNotificationEvent(**course_notification_data)
+    other = CourseNotificationEvent(
+        **course_notification_data | {"event": "Actualizado"}
+    )
+
+    assert course_event_key(notification) == course_event_key(
+        CourseNotificationEvent(**course_notification_data)
+    )
+    assert course_event_key(notification) != course_event_key(other)
+    assert course_event_key(notification, "mensaje-1") == "mensaje-1"
+
+
+@pytest.mark.asyncio
+async def test_process_course_chunk_notifies_recipients_once(
+    db_session,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+):
+    """Test que verifica que un bloque notifica a sus destinatarios y se descarta si se reentrega"""
+    mock_users_service.return_value = users_info([1, 2])
+    mock_users_preferences.return_value = users_preferences([1, 2])
+
+    chunk = CourseChunkNotificationEvent(
+        **course_notification_data | {"event_type": "course_chunk_notification"},
+        chunk_id="mensaje-1:0",
+        recipients=[1, 2],
+    )
+
+    with patch("app.services.notification_processor.SessionLocal", lambda: db_session):
+        await process_course_chunk(chunk)
+        await process_course_chunk(chunk)
+
+    mock_users_service.assert_called_once_with([1, 2])
+    assert mock_email_service.call_count == 2
+    assert is_chunk_processed(db_session, "mensaje-1:0")
+
+
+def test_mark_chunk_processed_twice(db_session):
+    """Test que verifica que marcar dos veces el mismo bloque no falla"""
+    stale_before = datetime.now(timezone.utc) - timedelta(minutes=1)
+    assert claim_chunk(db_session, "mensaje-1:0", stale_before)
+    assert not is_chunk_processed(db_session, "mensaje-1:0")
+    mark_chunk_processed(db_session, "mensaje-1:0")
+    mark_chunk_processed(db_session, "mensaje-1:0")
+
+    assert is_chunk_processed(db_session, "mensaje-1:0")
+    assert not claim_chunk(db_session, "mensaje-1:0", stale_before)
+
+
+def test_claim_chunk_only_once_until_lease_expires(db_session):
+    """Test que verifica que un bloque tomado solo se retoma cuando su toma vence"""
+    now = datetime.now(timezone.utc)
+    assert claim_chunk(db_session, "mensaje-1:0", now - timedelta(minutes=1))
+    assert not claim_chunk(db_session, "mensaje-1:0", now - timedelta(minutes=1))
+    # La toma anterior quedo vieja: el worker que lo tenia se cayo
+    assert claim_chunk(db_session, "mensaje-1:0", now + timedelta(minutes=1))
+
+
+@pytest.fixture
+def chunk_sessions(tmp_path):
+    """Base en archivo para que varias copias de un bloque usen conexiones propias"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'chunks.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with patch("app.services.notification_processor.SessionLocal", session_factory):
+        yield session_factory
+    engine.dispose()
+
+
+def course_chunk(chunk_id="mensaje-1:0", recipients=(1, 2)):
+    return CourseChunkNotificationEvent(
+        **course_notification_data | {"event_type": "course_chunk_notification"},
+        chunk_id=chunk_id,
+        recipients=list(recipients),
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_course_chunk_concurrent_copies_notify_once(
+    chunk_sessions,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+):
+    """Test que verifica que dos copias del mismo bloque procesadas a la vez notifican una sola vez"""
+    mock_users_service.return_value = users_info([1, 2])
+    mock_users_preferences.return_value = users_preferences([1, 2])
+    mock_email_service.side_effect = lambda *args: time.sleep(0.05)
+
+    results = await asyncio.gather(
+        process_course_chunk(course_chunk()),
+        process_course_chunk(course_chunk()),
+        return_exceptions=True,
+    )
+
+    assert mock_email_service.call_count == 2
+    # La copia que no tomo el bloque se reintenta mas tarde
+    assert [result.status_code for result in results if result is not None] == [409]
+    with chunk_sessions() as db:
+        assert is_chunk_processed(db, "mensaje-1:0")
+
+    # Al reintentarse, el bloque ya terminado se descarta
+    await process_course_chunk(course_chunk())
+    assert mock_email_service.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_course_chunk_retakes_abandoned_claim(
+    chunk_sessions,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+):
+    """Test que verifica que un bloque tomado por un worker caído se retoma al vencer la toma"""
+    mock_users_service.return_value = users_info([1, 2])
+    mock_users_preferences.return_value = users_preferences([1, 2])
+    with chunk_sessions() as db:
+        db.add(
+            ProcessedChunk(
+                chunk_id="mensaje-1:0",
+                claimed_at=datetime.now(timezone.utc) - timedelta(minutes=5),
+            )
+        )
+        db.commit()
+
+    await process_course_chunk(course_chunk())
+
+    assert mock_email_service.call_count == 2
+    with chunk_sessions() as db:
+        assert is_chunk_processed(db, "mensaje-1:0")
+
+
+@pytest.mark.asyncio
+async def test_process_course_chunk_failure_releases_claim(
+    chunk_sessions,
+    mock_users_service,
+    mock_users_preferences,
+    mock_format_notification,
+    mock_email_service,
+    mock_push_service,
+    mock_log_repository,
+):
+    """Test que verifica que si el bloque falla se libera para que el reintento lo procese"""
+    mock_users_service.side_effect = [
+        Exception("Auth service caido"),
+        users_info([1, 2]),
+    ]
+    mock_users_preferences.return_value = users_preferences([1, 2])
+
+    with pytest.raises(HTTPException):
+        await process_course_chunk(course_chunk())
+    await process_course_chunk(course_chunk())
+
+    assert mock_email_service.call_count == 2
 
 
 @pytest.mark.asyncio
@@ -455,8 +1039,8 @@ async def test_process_message_user_notification(
 @pytest.mark.asyncio
 async def test_process_message_course_notification(
     mock_courses_service,
-    mock_user_service,
-    mock_user_repository,
+    mock_users_service,
+    mock_users_preferences,
     mock_format_notification,
     mock_email_service,
     mock_push_service,
@@ -466,10 +1050,8 @@ async def test_process_message_course_notification(
     """Test que verifica el procesamiento de mensaje de notificación de curso"""
     user_list = [1]
     mock_courses_service.return_value = user_list
-    mock_user_service.return_value = user_info_data
-
-    user = User(id=1, tarea_email=True, tarea_push=True, token_fcm="fcm_token_123")
-    mock_user_repository["get"].return_value = user
+    mock_users_service.return_value = users_info(user_list)
+    mock_users_preferences.return_value = users_preferences(user_list)
 
     message_body = json.dumps(course_notification_data).encode("utf-8")
 
@@ -477,7 +1059,7 @@ async def test_process_message_course_notification(
 
     # Verificar que se procesó la notificación
     mock_courses_service.assert_called_once()
-    mock_user_service.assert_called_once()
+    mock_users_service.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,411 @@
+import asyncio
+import logging
+import pytest
+from unittest.mock import patch
+from app.workers.ack_batcher import AckBatcher
+from app.utils.queue_routing import queue_for_event, split_by_weight
+from app.utils.retry_policy import (
+    next_retry_destination,
+    retry_delay_ms,
+    retry_queue_arguments,
+    retry_window_ms,
+)
+from app.services.courses_service import get_roster_cache
+from app.services.user_service import get_user_info_cache
+from app.workers.notification_worker import NotificationWorker, QueueConsumer
+
+
+class FakeIncomingMessage:
+    def __init__(self, delivery_tag, body, acks, headers=None):
+        self.delivery_tag = delivery_tag
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = None
+        self.message_id = None
+        self.timestamp = None
+        self._acks = acks
+        self.nacked = False
+
+    async def ack(self, multiple=False):
+        self._acks.append((self.delivery_tag, multiple))
+
+    async def nack(self, requeue=True):
+        self.nacked = True
+
+
+class FakeQueueRepository:
+    """Reemplazo de AsyncQueueRepository que entrega los mensajes a mano"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.prefetch_counts = {}
+        self.close_callbacks = []
+        self.closed = False
+        self.published = []
+        self.expirations = []
+        self.subscriptions = {}
+        self.fail_publish = False
+
+    async def connect(self):
+        pass
+
+    async def consume(self, queue, callback, prefetch_count, on_channel_close=None):
+        self.callbacks[queue] = callback
+        self.prefetch_counts[queue] = prefetch_count
+        self.close_callbacks.append(on_channel_close)
+        return f"consumer-{queue}"
+
+    async def publish(self, routing_key, body, headers=None, **properties):
+        if self.fail_publish:
+            raise ConnectionError("Broker no disponible")
+        self.published.append((routing_key, body, headers))
+        self.expirations.append(properties.get("expiration_ms"))
+
+    async def subscribe(self, exchange, callback):
+        self.subscriptions[exchange] = callback
+        return f"subscriber-{exchange}"
+
+    async def cancel(self, consumer_tag):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_messages_concurrently():
+    """Test que verifica que un mensaje lento no bloquea a los siguientes"""
+    release = asyncio.Event()
+    processed = []
+    acks = []
+
+    async def fake_process_message(body, *properties):
+        if body == b"lento":
+            await release.wait()
+        processed.append(body)
+
+    queue_repo = FakeQueueRepository()
+    worker = NotificationWorker(queue_repo)
+    with patch(
+        "app.workers.notification_worker.process_message",
+        side_effect=fake_process_message,
+    ):
+        await worker.start()
+        slow = asyncio.create_task(
+            queue_repo.callbacks["notification"](FakeIncomingMessage(1, b"lento", acks))
+        )
+        await queue_repo.callbacks["notification"](
+            FakeIncomingMessage(2, b"rapido", acks)
+        )
+
+        assert processed == [b"rapido"]
+        assert not slow.done()
+
+        release.set()
+        await slow
+        await worker.stop()
+
+    assert processed == [b"rapido", b"lento"]
+    # Al detenerse se confirman juntos con un unico ack multiple
+    assert acks == [(2, True)]
+    assert queue_repo.closed
+
+
+@pytest.mark.asyncio
+async def test_worker_discards_acks_when_channel_closes():
+    """Test que verifica que no se usan delivery tags de un canal cerrado"""
+    acks = []
+    queue_repo = FakeQueueRepository()
+    worker = NotificationWorker(queue_repo)
+    with patch("app.workers.notification_worker.process_message"):
+        await worker.start()
+        await queue_repo.callbacks["notification"](
+            FakeIncomingMessage(1, b"viejo", acks)
+        )
+        for callback in queue_repo.close_callbacks:
+            callback(None, None)
+        await queue_repo.callbacks["notification"](
+            FakeIncomingMessage(1, b"nuevo", acks)
+        )
+        await worker.stop()
+
+    assert acks == [(1, True)]
+
+
+@pytest.mark.asyncio
+async def test_worker_routes_failed_message_to_retry_queue():
+    """Test que verifica que un mensaje fallido se deriva a la cola de espera del intento"""
+    acks = []
+    queue_repo = FakeQueueRepository()
+    worker = NotificationWorker(queue_repo)
+    with patch(
+        "app.workers.notification_worker.process_message", return_value=False
+    ), patch("app.utils.retry_policy.settings.RETRY_BASE_DELAY_MS", 1000):
+        await worker.start()
+        await queue_repo.callbacks["notification"](
+            FakeIncomingMessage(1, b"fallido", acks)
+        )
+        await worker.stop()
+
+    assert queue_repo.published == [
+        ("notification.retry.1", b"fallido", {"x-retry-count": 1})
+    ]
+    # La demora viaja en el mensaje, no en los argumentos de la cola
+    assert queue_repo.expirations == [1000]
+    # El original se confirma, el reintento lo entrega el broker al vencer
+    assert acks == [(1, True)]
+
+
+@pytest.mark.asyncio
+async def test_worker_parks_message_after_max_attempts():
+    """Test que verifica que se estaciona el mensaje al agotar los reintentos"""
+    acks = []
+    queue_repo = FakeQueueRepository()
+    worker = NotificationWorker(queue_repo)
+    with patch(
+        "app.workers.notification_worker.process_message", return_value=False
+    ), patch("app.utils.retry_policy.settings.RETRY_MAX_ATTEMPTS", 3):
+        await worker.start()
+        await queue_repo.callbacks["notification"](
+            FakeIncomingMessage(1, b"fallido", acks, headers={"x-retry-count": 3})
+        )
+        await worker.stop()
+
+    assert queue_repo.published == [
+        ("notification.parking", b"fallido", {"x-retry-count": 4})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_requeues_when_retry_publish_fails():
+    """Test que verifica que si no se puede derivar el mensaje vuelve a la cola sin ack"""
+    acks = []
+    queue_repo = FakeQueueRepository()
+    queue_repo.fail_publish = True
+    worker = NotificationWorker(queue_repo)
+    message = FakeIncomingMessage(1, b"fallido", acks)
+    with patch("app.workers.notification_worker.process_message", return_value=False):
+        await worker.start()
+        await queue_repo.callbacks["notification"](message)
+        await worker.stop()
+
+    assert message.nacked
+    assert acks == []
+
+
+@pytest.mark.asyncio
+async def test_worker_consumes_both_queues_by_weight():
+    """Test que verifica que el prefetch se reparte entre la cola transaccional y la masiva"""
+    queue_repo = FakeQueueRepository()
+    with patch(
+        "app.workers.notification_worker.settings.RABBITMQ_PREFETCH_COUNT", 20
+    ), patch("app.utils.queue_routing.settings.TRANSACTIONAL_QUEUE_WEIGHT", 3), patch(
+        "app.utils.queue_routing.settings.BULK_QUEUE_WEIGHT", 1
+    ):
+        worker = NotificationWorker(queue_repo)
+        await worker.start()
+        await worker.stop()
+
+    assert queue_repo.prefetch_counts == {"notification": 15, "notification_bulk": 5}
+
+
+@pytest.mark.asyncio
+async def test_worker_acks_before_prefetch_window_fills():
+    """Test que verifica que el lote de acks se achica para no agotar el prefetch"""
+    acks = []
+    releases = {tag: asyncio.Event() for tag in (1, 2, 3, 4)}
+
+    async def fake_process_message(body, *properties):
+        await releases[int(body)].wait()
+        return True
+
+    with patch(
+        "app.workers.notification_worker.process_message",
+        side_effect=fake_process_message,
+    ), patch("app.workers.notification_worker.settings.ACK_BATCH_SIZE", 10):
+        consumer = QueueConsumer(
+            FakeQueueRepository(), "notification", prefetch_count=4, concurrency=2
+        )
+        tasks = [
+            asyncio.create_task(
+                consumer.on_message(FakeIncomingMessage(tag, str(tag).encode(), acks))
+            )
+            for tag in (1, 2, 3, 4)
+        ]
+        await asyncio.sleep(0)
+        releases[1].set()
+        releases[2].set()
+        await asyncio.gather(*tasks[:2])
+
+        # El 3 y el 4 siguen en la ventana: con un lote de 10 el broker no
+        # entregaria nada mas hasta que venza el intervalo
+        assert acks == [(2, True)]
+
+        releases[3].set()
+        releases[4].set()
+        await asyncio.gather(*tasks[2:])
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_bulk_message_in_bulk_retry_queue():
+    """Test que verifica que los reintentos vuelven a la cola de la que salieron"""
+    acks = []
+    queue_repo = FakeQueueRepository()
+    worker = NotificationWorker(queue_repo)
+    with patch("app.workers.notification_worker.process_message", return_value=False):
+        await worker.start()
+        await queue_repo.callbacks["notification_bulk"](
+            FakeIncomingMessage(1, b"curso", acks)
+        )
+        await worker.stop()
+
+    assert queue_repo.published == [
+        ("notification_bulk.retry.1", b"curso", {"x-retry-count": 1})
+    ]
+
+
+def test_queue_for_event_routes_course_to_bulk_queue():
+    """Test que verifica que solo los fan-out de curso van a la cola masiva"""
+    assert queue_for_event("course_notification") == "notification_bulk"
+    assert queue_for_event("course_chunk_notification") == "notification_bulk"
+    assert queue_for_event("user_notification") == "notification"
+    assert queue_for_event("aux_teacher_notification") == "notification"
+
+
+def test_split_by_weight_gives_every_queue_capacity():
+    """Test que verifica que ninguna cola queda sin capacidad"""
+    assert split_by_weight(10, [3, 1]) == [8, 2]
+    assert split_by_weight(2, [9, 1]) == [2, 1]
+
+
+def test_retry_policy_exponential_backoff():
+    """Test que verifica el backoff exponencial y el dead-letter a la cola original"""
+    with patch("app.utils.retry_policy.settings.RETRY_BASE_DELAY_MS", 1000):
+        assert [retry_delay_ms(attempt) for attempt in (1, 2, 3, 4)] == [
+            1000,
+            2000,
+            4000,
+            8000,
+        ]
+        assert retry_window_ms() == 1000 + 2000 + 4000 + 8000 + 16000
+        assert retry_queue_arguments("notification") == {
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": "notification",
+        }
+
+
+def test_retry_policy_keeps_existing_headers():
+    """Test que verifica que se incrementa el contador conservando los headers"""
+    with patch("app.utils.retry_policy.settings.RETRY_BASE_DELAY_MS", 1000):
+        routing_key, headers, expiration_ms = next_retry_destination(
+            "notification", {"x-retry-count": 1, "otro": "valor"}
+        )
+    assert routing_key == "notification.retry.2"
+    assert headers == {"x-retry-count": 2, "otro": "valor"}
+    assert expiration_ms == 2000
+
+
+def test_retry_policy_parking_has_no_expiration():
+    """Test que verifica que el mensaje que agoto los reintentos no vence en la cola de estacionamiento"""
+    with patch("app.utils.retry_policy.settings.RETRY_MAX_ATTEMPTS", 2):
+        routing_key, headers, expiration_ms = next_retry_destination(
+            "notification", {"x-retry-count": 2}
+        )
+    assert routing_key == "notification.parking"
+    assert expiration_ms is None
+
+
+def test_ack_batcher_acks_multiple_after_batch_size():
+    """Test que verifica que se envia un unico ack multiple al completar el lote"""
+    acks = []
+    batcher = AckBatcher(
+        lambda tag, multiple: acks.append((tag, multiple)), max_batch=3, max_delay=10
+    )
+    for tag in (1, 2, 3):
+        batcher.delivered(tag)
+
+    batcher.completed(2)
+    batcher.completed(1)
+    assert acks == []
+
+    batcher.completed(3)
+    assert acks == [(3, True)]
+
+
+def test_ack_batcher_waits_for_slow_message():
+    """Test que verifica que no se confirma un tag mientras uno anterior sigue en proceso"""
+    acks = []
+    batcher = AckBatcher(
+        lambda tag, multiple: acks.append((tag, multiple)), max_batch=2, max_delay=10
+    )
+    for tag in (1, 2, 3, 4):
+        batcher.delivered(tag)
+
+    batcher.completed(1)
+    batcher.completed(3)
+    assert acks == [(1, True)]
+
+    batcher.completed(4)
+    assert acks == [(1, True)]
+
+    batcher.completed(2)
+    assert acks == [(1, True), (4, True)]
+
+
+def test_ack_batcher_flushes_after_interval():
+    """Test que verifica que los acks pendientes se envian al vencer el intervalo"""
+    acks = []
+    clock = FakeClock()
+    batcher = AckBatcher(
+        lambda tag, multiple: acks.append((tag, multiple)),
+        max_batch=10,
+        max_delay=0.5,
+        clock=clock,
+    )
+    for tag in (1, 2, 3):
+        batcher.delivered(tag)
+
+    batcher.completed(1)
+    batcher.completed(3)
+    batcher.tick()
+    assert acks == []
+
+    clock.now = 1.0
+    batcher.tick()
+    # El 1 entra en el ack multiple, el 3 se confirma solo porque el 2 sigue en proceso
+    assert acks == [(1, True), (3, False)]
+
+
+@pytest.mark.asyncio
+async def test_worker_logs_cache_stats(caplog):
+    """Test que verifica que cada worker registra periódicamente las métricas de sus caches"""
+    get_roster_cache().get("curso-123")
+    get_user_info_cache().set(1, "usuario")
+    get_user_info_cache().get(1)
+    get_user_info_cache().get(2)
+    worker = NotificationWorker(FakeQueueRepository())
+
+    with patch(
+        "app.workers.notification_worker.settings.CACHE_STATS_LOG_INTERVAL", 0.01
+    ), caplog.at_level(logging.INFO):
+        await worker.start()
+        await asyncio.sleep(0.05)
+        await worker.stop()
+
+    assert worker.cache_stats()["user_info"]["hits"] == 1
+    assert worker.cache_stats()["course_roster"]["misses"] == 1
+    lines = [
+        record.message
+        for record in caplog.records
+        if "Cache user_info" in record.message
+    ]
+    assert lines and "hit_ratio=0.50" in lines[0] and "size=1" in lines[0]
+    assert any("Cache course_roster" in record.message for record in caplog.records)
@@ -1,6 +1,7 @@
 import pytest
 from fastapi import HTTPException, status
 from app.models.user import User
+from unittest.mock import patch
 
 user_notification_data = {
     "id_user": 1,
@@ -295,3 +296,153 @@ def test_create_auxiliary_teacher_notification_missing_required_fields(
     )
 
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+batch_notification_data = {
+    "notifications": [
+        {**user_notification_data, "event_type": "user_notification"},
+        {**course_notification_data, "event_type": "course_notification"},
+        auxiliary_teacher_notification_data,
+    ]
+}
+
+
+def test_create_notifications_batch_success(
+    client, mock_auth_service, mock_queue_repository
+):
+    mock_auth_service.return_value = 1
+    mock_queue_repository.send_batch.return_value = [None, None, None]
+
+    response = client.post(
+        "/notify/batch",
+        headers={"Authorization": "Bearer valid_token"},
+        json=batch_notification_data,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["success"] is True
+    assert [result["success"] for result in data["results"]] == [True, True, True]
+    assert mock_auth_service.call_count == 1
+
+    messages = mock_queue_repository.send_batch.call_args.args[0]
+    assert [message["event_type"] for message in messages] == [
+        "user_notification",
+        "course_notification",
+        "aux_teacher_notification",
+    ]
+
+
+def test_create_notifications_batch_partial_failure(
+    client, mock_auth_service, mock_queue_repository
+):
+    mock_auth_service.return_value = 1
+    mock_queue_repository.send_batch.return_value = [
+        None,
+        HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        ),
+        None,
+    ]
+
+    response = client.post(
+        "/notify/batch",
+        headers={"Authorization": "Bearer valid_token"},
+        json=batch_notification_data,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["success"] is False
+    assert data["results"][1] == {
+        "index": 1,
+        "success": False,
+        "detail": "Error interno del servidor",
+    }
+
+
+def test_create_notifications_batch_unauthorized(client, mock_auth_service):
+    mock_auth_service.side_effect = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido o expirado",
+    )
+
+    response = client.post(
+        "/notify/batch",
+        headers={"Authorization": "Bearer invalid_token"},
+        json=batch_notification_data,
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_create_notifications_batch_requires_event_type(client, mock_auth_service):
+    mock_auth_service.return_value = 1
+
+    response = client.post(
+        "/notify/batch",
+        headers={"Authorization": "Bearer valid_token"},
+        json={"notifications": [user_notification_data]},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_invalidate_course_users_endpoint(
+    client, mock_auth_service, mock_queue_repository
+):
+    with patch(
+        "app.controller.notification_controller.invalidate_course_users",
+        return_value=True,
+    ) as mock_invalidate:
+        response = client.post(
+            "/courses/curso-123/invalidate-users",
+            headers={"Authorization": "Bearer valid_token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"success": True}
+    mock_invalidate.assert_called_once_with("curso-123")
+    # La invalidacion se difunde a los workers de todos los procesos
+    mock_queue_repository.broadcast.assert_awaited_once_with(
+        "notification_invalidations", b"curso-123"
+    )
+
+
+def test_invalidate_course_users_without_queue(
+    client, mock_auth_service, mock_queue_repository
+):
+    mock_queue_repository.broadcast.side_effect = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+    response = client.post(
+        "/courses/curso-123/invalidate-users",
+        headers={"Authorization": "Bearer valid_token"},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_invalidate_course_users_unauthorized(client, mock_auth_service):
+    mock_auth_service.side_effect = HTTPException(status_code=401)
+
+    response = client.post(
+        "/courses/curso-123/invalidate-users",
+        headers={"Authorization": "Bearer invalid_token"},
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_get_cache_metrics(client):
+    response = client.get("/metrics/cache")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["course_roster"]["hits"] == 0
+    assert {"hits", "misses", "hit_ratio", "size", "evictions"} <= set(
+        data["user_info"]
+    )
+    assert data["user_tokens"]["validations"]["remote"] == 0
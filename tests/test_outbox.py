@@ -0,0 +1,137 @@
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException, status
+from app.models.outbox_message import OutboxMessage
+from app.models.processed_chunk import ProcessedChunk
+from app.repositories.outbox_repository import add_messages
+from app.workers.outbox_relay import OutboxRelay, relay_outbox_batch
+
+user_notification_data = {
+    "event_type": "user_notification",
+    "id_user": 1,
+    "notification_type": "Tarea",
+    "event": "Entregado",
+    "data": {"titulo": "Tarea 1", "fecha": "2024-03-20"},
+}
+
+course_notification_data = {
+    "event_type": "course_notification",
+    "id_course": "curso-123",
+    "notification_type": "Tarea",
+    "event": "Nuevo",
+    "data": {"titulo": "Tarea 1", "fecha": "2024-03-20"},
+}
+
+batch_notification_data = {
+    "notifications": [
+        user_notification_data,
+        course_notification_data,
+        user_notification_data,
+    ]
+}
+
+broker_unavailable = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Cola de mensajes no disponible",
+)
+
+
+def test_notification_saved_to_outbox_when_broker_unavailable(
+    client, mock_auth_service, mock_queue_repository, db_session
+):
+    """Test que verifica que sin broker la notificación se acepta y queda en el outbox"""
+    mock_auth_service.return_value = 1
+    mock_queue_repository.send_message.side_effect = broker_unavailable
+
+    response = client.post(
+        "/notify/user",
+        headers={"Authorization": "Bearer valid_token"},
+        json=user_notification_data,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    saved = db_session.query(OutboxMessage).all()
+    assert len(saved) == 1
+    assert json.loads(saved[0].payload)["id_user"] == 1
+
+
+def test_batch_saved_to_outbox_when_broker_unavailable(
+    client, mock_auth_service, mock_queue_repository, db_session
+):
+    """Test que verifica que solo los items rechazados por falta de broker van al outbox"""
+    mock_auth_service.return_value = 1
+    mock_queue_repository.send_batch.return_value = [None, broker_unavailable, None]
+
+    response = client.post(
+        "/notify/batch",
+        headers={"Authorization": "Bearer valid_token"},
+        json=batch_notification_data,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["success"] is True
+    saved = db_session.query(OutboxMessage).all()
+    assert [json.loads(message.payload)["event_type"] for message in saved] == [
+        "course_notification"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_relay_deletes_only_confirmed_messages(db_session):
+    """Test que verifica que el relay borra los confirmados y deja los fallidos para reintentar"""
+    add_messages(db_session, [{"id_user": 1}, {"id_user": 2}])
+    publisher = MagicMock()
+    publisher.send_batch = AsyncMock(return_value=[None, broker_unavailable])
+
+    published = await relay_outbox_batch(publisher, db_session)
+
+    assert published == 1
+    assert publisher.send_batch.call_args.args[0] == [{"id_user": 1}, {"id_user": 2}]
+    remaining = db_session.query(OutboxMessage).all()
+    assert [json.loads(message.payload) for message in remaining] == [{"id_user": 2}]
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_messages_when_broker_down(db_session):
+    """Test que verifica que si el broker sigue caído no se pierde ningún mensaje"""
+    add_messages(db_session, [{"id_user": 1}])
+    publisher = MagicMock()
+    publisher.send_batch = AsyncMock(side_effect=broker_unavailable)
+
+    assert await relay_outbox_batch(publisher, db_session) == 0
+    assert db_session.query(OutboxMessage).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_relay_purges_expired_processed_chunks(db_session):
+    """Test que verifica que se borran solo las marcas de bloques que ya no pueden volver a entregarse"""
+    now = datetime.now(timezone.utc)
+    db_session.add_all(
+        [
+            ProcessedChunk(
+                chunk_id="viejo:0",
+                claimed_at=now - timedelta(hours=2),
+                created_at=now - timedelta(hours=2),
+            ),
+            ProcessedChunk(
+                chunk_id="reciente:0",
+                claimed_at=now - timedelta(minutes=5),
+                created_at=now - timedelta(minutes=5),
+            ),
+        ]
+    )
+    db_session.commit()
+    relay = OutboxRelay(publisher=MagicMock(), session_factory=lambda: db_session)
+
+    # Ventana de reintentos: 1 + 2 segundos, mas una hora de margen
+    with patch("app.utils.retry_policy.settings.RETRY_MAX_ATTEMPTS", 2), patch(
+        "app.utils.retry_policy.settings.RETRY_BASE_DELAY_MS", 1000
+    ), patch(
+        "app.services.notification_processor.settings.PROCESSED_CHUNK_RETENTION", 3600
+    ):
+        await relay.purge_processed_chunks()
+
+    remaining = [chunk.chunk_id for chunk in db_session.query(ProcessedChunk).all()]
+    assert remaining == ["reciente:0"]
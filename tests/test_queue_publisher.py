@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from aio_pika.exceptions import DeliveryError
+from aiormq import spec
+from fastapi import HTTPException, status
+from app.repositories.async_queue_repository import AsyncQueueRepository
+from app.repositories.queue_publisher import QueuePublisher
+
+course_message = {"event_type": "course_notification", "id_course": "1"}
+
+
+class FakeExchange:
+    """Exchange que confirma cada publicación recién cuando se libera `confirm`"""
+
+    def __init__(self, delay=0, nack=False):
+        self.delay = delay
+        self.nack = nack
+        self.sent = []
+        self.published = []
+        self.confirm = asyncio.Event()
+        self.confirm.set()
+
+    async def publish(self, message, routing_key):
+        self.sent.append(routing_key)
+        await asyncio.sleep(self.delay)
+        await self.confirm.wait()
+        if self.nack:
+            raise DeliveryError(message, spec.Basic.Nack())
+        self.published.append((routing_key, message.body))
+
+
+def connected_publisher(exchange):
+    queue_repo = AsyncQueueRepository()
+    queue_repo._connection = MagicMock(is_closed=False)
+    channel = MagicMock()
+    channel.default_exchange = exchange
+    queue_repo._channels = [channel]
+    return QueuePublisher(queue_repo)
+
+
+@pytest.mark.asyncio
+async def test_publisher_routes_message_to_queue():
+    """Test que verifica que el mensaje se publica en la cola que le corresponde"""
+    exchange = FakeExchange()
+    publisher = connected_publisher(exchange)
+
+    assert await publisher.send_message(course_message) is True
+    assert exchange.published[0][0] == "notification_bulk"
+
+
+@pytest.mark.asyncio
+async def test_publisher_without_connection_fails_fast():
+    """Test que verifica que sin conexión se responde 503 y se reconecta en segundo plano"""
+    publisher = QueuePublisher(AsyncQueueRepository())
+    connect_attempted = asyncio.Event()
+
+    async def failing_connect(*args, **kwargs):
+        connect_attempted.set()
+        raise ConnectionError("Broker no disponible")
+
+    with patch(
+        "app.repositories.async_queue_repository.aio_pika.connect_robust",
+        failing_connect,
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await publisher.send_message(course_message)
+        await asyncio.wait_for(connect_attempted.wait(), timeout=1)
+
+    assert exc.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    await publisher.close()
+
+
+@pytest.mark.asyncio
+async def test_publisher_times_out_on_slow_broker():
+    """Test que verifica que un broker lento no retiene el request más allá del timeout"""
+    publisher = connected_publisher(FakeExchange(delay=1))
+
+    with patch(
+        "app.repositories.queue_publisher.settings.RABBITMQ_PUBLISH_TIMEOUT", 0.01
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await publisher.send_message(course_message)
+
+    assert exc.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_publisher_pipelines_unconfirmed_messages():
+    """Test que verifica que no se espera la confirmación anterior para publicar en el mismo canal"""
+    exchange = FakeExchange()
+    exchange.confirm.clear()
+    publisher = connected_publisher(exchange)
+
+    sends = [
+        asyncio.create_task(publisher.send_message(course_message)) for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    assert len(exchange.sent) == 3
+    assert exchange.published == []
+
+    exchange.confirm.set()
+    assert await asyncio.gather(*sends) == [True, True, True]
+    assert len(exchange.published) == 3
+
+
+@pytest.mark.asyncio
+async def test_publisher_nack_returns_service_unavailable():
+    """Test que verifica que un Basic.Nack del broker no se reporta como encolado"""
+    publisher = connected_publisher(FakeExchange(nack=True))
+
+    with pytest.raises(HTTPException) as exc:
+        await publisher.send_message(course_message)
+
+    assert exc.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_publisher_batch_reports_each_message():
+    """Test que verifica que un batch devuelve el resultado de cada mensaje en orden"""
+    exchange = FakeExchange()
+    publisher = connected_publisher(exchange)
+    user_message = {"event_type": "user_notification", "id_user": 1}
+
+    errors = await publisher.send_batch([user_message, course_message])
+
+    assert errors == [None, None]
+    assert [routing_key for routing_key, _ in exchange.published] == [
+        "notification",
+        "notification_bulk",
+    ]
@@ -0,0 +1,325 @@
+import asyncio
+import time
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.core.auth import ServiceAuth
+from app.services.user_service import (
+    get_info_user,
+    get_info_users,
+    get_user_info_cache,
+    get_token_validation_counts,
+    validate_user,
+)
+
+SIGNING_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def user_data(user_id):
+    return {"id": user_id, "email": f"usuario{user_id}@test.com", "name": "Usuario"}
+
+
+@pytest.fixture
+def mock_service_auth():
+    with patch("app.services.user_service.get_service_auth") as mock:
+        auth = MagicMock()
+        auth.get_token.return_value = "service_token"
+        auth.renew_token = AsyncMock()
+        mock.return_value = auth
+        yield auth
+
+
+@pytest.fixture
+def auth_requests():
+    """Reemplaza el auth service por un handler y registra los requests recibidos"""
+    requests = []
+    state = {"handler": None}
+
+    def handle(request):
+        requests.append(request)
+        return state["handler"](request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    with patch(
+        "app.services.user_service.get_auth_client",
+        lambda: client,
+    ), patch("app.services.user_service.settings.AUTH_SERVICE_URL", "http://auth"):
+        yield requests, state
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_batch_endpoint(mock_service_auth, auth_requests):
+    """Test que verifica que con endpoint batch se hace un request por bloque"""
+    requests, state = auth_requests
+
+    def handler(request):
+        ids = request.url.params["ids"].split(",")
+        return httpx.Response(200, json=[user_data(int(id)) for id in ids])
+
+    state["handler"] = handler
+
+    with patch(
+        "app.services.user_service.settings.AUTH_USERS_BATCH_PATH", "/users/batch"
+    ), patch("app.services.user_service.settings.USER_INFO_CHUNK_SIZE", 2):
+        users = await get_info_users([1, 2, 3, 3])
+
+    assert sorted(users) == [1, 2, 3]
+    assert users[3].email == "usuario3@test.com"
+    assert len(requests) == 2
+    assert all(request.url.path == "/users/batch" for request in requests)
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_without_batch_endpoint(mock_service_auth, auth_requests):
+    """Test que verifica que sin endpoint batch se piden de a uno y se omiten los fallidos"""
+    requests, state = auth_requests
+
+    def handler(request):
+        user_id = int(request.url.path.rsplit("/", 1)[-1])
+        if user_id == 2:
+            return httpx.Response(404)
+        return httpx.Response(200, json=user_data(user_id))
+
+    state["handler"] = handler
+
+    with patch("app.services.user_service.settings.AUTH_USERS_BATCH_PATH", None):
+        users = await get_info_users([1, 2, 3])
+
+    assert sorted(users) == [1, 3]
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_batch_error_falls_back(mock_service_auth, auth_requests):
+    """Test que verifica que si falla el endpoint batch se piden los usuarios de a uno"""
+    requests, state = auth_requests
+
+    def handler(request):
+        if request.url.path == "/users/batch":
+            return httpx.Response(404)
+        return httpx.Response(
+            200, json=user_data(int(request.url.path.rsplit("/", 1)[-1]))
+        )
+
+    state["handler"] = handler
+
+    with patch(
+        "app.services.user_service.settings.AUTH_USERS_BATCH_PATH", "/users/batch"
+    ):
+        users = await get_info_users([1, 2])
+
+    assert sorted(users) == [1, 2]
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_renews_expired_token(mock_service_auth, auth_requests):
+    """Test que verifica que ante un 401 se renueva el token y se reintenta el bloque"""
+    requests, state = auth_requests
+    responses = iter([httpx.Response(401), httpx.Response(200, json=[user_data(1)])])
+    state["handler"] = lambda request: next(responses)
+
+    with patch(
+        "app.services.user_service.settings.AUTH_USERS_BATCH_PATH", "/users/batch"
+    ):
+        users = await get_info_users([1])
+
+    assert list(users) == [1]
+    mock_service_auth.renew_token.assert_awaited_once_with("service_token")
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_concurrent_401_share_one_login():
+    """Test que verifica que varios 401 a la vez renuevan el token de servicio una sola vez"""
+    issued = []
+
+    async def handle(request):
+        # Respuestas lentas, asi los pedidos del bloque estan en curso a la vez
+        await asyncio.sleep(0.01)
+        if request.url.path == "/token/service":
+            issued.append(f"token-{len(issued)}")
+            return httpx.Response(200, json={"access_token": issued[-1]})
+        if not issued or request.headers["Authorization"] != f"Bearer {issued[-1]}":
+            return httpx.Response(401)
+        return httpx.Response(200, json=user_data(int(request.url.path.split("/")[-1])))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    with patch("app.core.auth.settings.AUTH_SERVICE_URL", "http://auth"):
+        auth = ServiceAuth()
+
+    with patch("app.services.user_service.get_service_auth", return_value=auth), patch(
+        "app.services.user_service.get_auth_client", lambda: client
+    ), patch("app.core.auth.get_auth_client", lambda: client), patch(
+        "app.services.user_service.settings.AUTH_SERVICE_URL", "http://auth"
+    ), patch(
+        "app.services.user_service.settings.AUTH_USERS_BATCH_PATH", None
+    ):
+        # Proceso worker que todavia no tiene token: todos los pedidos reciben 401
+        users = await get_info_users([1, 2, 3, 4, 5])
+        assert issued == ["token-0"]
+        # El token vence y los pedidos en curso vuelven a recibir 401 a la vez
+        issued.append("token-rotado")
+        get_user_info_cache().clear()
+        await get_info_users([1, 2, 3, 4, 5])
+
+    assert sorted(users) == [1, 2, 3, 4, 5]
+    assert issued == ["token-0", "token-rotado", "token-2"]
+    assert auth.get_token() == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_get_info_user_uses_cache(mock_service_auth, auth_requests):
+    """Test que verifica que la información de un usuario se pide una sola vez mientras está en cache"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(200, json=user_data(1))
+
+    assert (await get_info_user(1))["email"] == "usuario1@test.com"
+    assert (await get_info_user(1))["email"] == "usuario1@test.com"
+    users = await get_info_users([1])
+
+    assert users[1].email == "usuario1@test.com"
+    assert len(requests) == 1
+    assert get_user_info_cache().stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_info_user_caches_not_found(mock_service_auth, auth_requests):
+    """Test que verifica que un usuario inexistente también se cachea"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(404)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await get_info_user(7)
+        assert exc_info.value.status_code == 404
+    assert await get_info_users([7]) == {}
+
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_info_users_only_fetches_uncached(mock_service_auth, auth_requests):
+    """Test que verifica que el lote solo pide los usuarios que no están en cache"""
+    requests, state = auth_requests
+
+    def handler(request):
+        ids = request.url.params["ids"].split(",")
+        return httpx.Response(200, json=[user_data(int(id)) for id in ids if id != "3"])
+
+    state["handler"] = handler
+
+    with patch(
+        "app.services.user_service.settings.AUTH_USERS_BATCH_PATH", "/users/batch"
+    ):
+        first = await get_info_users([1, 2, 3])
+        second = await get_info_users([1, 2, 3, 4])
+
+    assert sorted(first) == [1, 2]
+    assert sorted(second) == [1, 2, 4]
+    assert requests[1].url.params["ids"] == "4"
+
+
+def user_token(key=SIGNING_KEY, **claims):
+    claims = {"sub": "5", "exp": int(time.time()) + 3600, **claims}
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": "auth-key"})
+
+
+@pytest.fixture
+def auth_jwks():
+    """Configura el JWKS del auth service con la clave publica de los tests"""
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(SIGNING_KEY.public_key(), as_dict=True)
+    jwks = {"keys": [{**jwk, "kid": "auth-key", "use": "sig", "alg": "RS256"}]}
+    with patch(
+        "app.services.user_service.settings.AUTH_JWKS_PATH", "/.well-known/jwks.json"
+    ), patch.object(jwt.PyJWKClient, "fetch_data", return_value=jwks) as fetch:
+        yield fetch
+
+
+@pytest.mark.asyncio
+async def test_validate_user_caches_valid_token(auth_requests):
+    """Test que verifica que un token validado con el auth service se cachea"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(200, json={"id": 5})
+    token = user_token()
+
+    assert await validate_user(token) == 5
+    assert await validate_user(token) == 5
+
+    assert len(requests) == 1
+    assert requests[0].url.path == "/me/"
+    counts = get_token_validation_counts()
+    assert counts["remote"] == 1
+    assert counts["cache"] == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_user_does_not_cache_expired_token(auth_requests):
+    """Test que verifica que un token vencido no queda en cache"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(200, json={"id": 5})
+    token = user_token(exp=int(time.time()) - 10)
+
+    await validate_user(token)
+    await validate_user(token)
+
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_user_rejected_token(auth_requests):
+    """Test que verifica que los tokens rechazados no se cachean"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(401)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await validate_user("token_invalido")
+        assert exc_info.value.status_code == 401
+
+    assert len(requests) == 2
+    assert get_token_validation_counts()["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_user_verifies_locally(auth_requests, auth_jwks):
+    """Test que verifica que con JWKS el token se valida sin llamar a /me/"""
+    requests, _ = auth_requests
+
+    assert await validate_user(user_token()) == 5
+    assert await validate_user(user_token(sub="6")) == 6
+
+    assert requests == []
+    auth_jwks.assert_called_once()
+    assert get_token_validation_counts()["local"] == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_user_local_invalid_signature(auth_requests, auth_jwks):
+    """Test que verifica que un JWT con firma invalida se rechaza localmente"""
+    requests, _ = auth_requests
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_user(user_token(key=other_key))
+
+    assert exc_info.value.status_code == 401
+    assert requests == []
+    assert get_token_validation_counts()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_user_local_fallback(auth_requests, auth_jwks):
+    """Test que verifica que si el token no es un JWT se valida con el auth service"""
+    requests, state = auth_requests
+    state["handler"] = lambda request: httpx.Response(200, json={"id": 5})
+
+    assert await validate_user("token_opaco") == 5
+
+    assert len(requests) == 1
+    counts = get_token_validation_counts()
+    assert counts["local_fallback"] == 1
+    assert counts["remote"] == 1
@@ -0,0 +1,136 @@
+import signal
+import pytest
+from unittest.mock import patch
+from app.workers import worker_pool
+
+
+class FakeProcess:
+    """Reemplazo de multiprocessing.Process que no lanza ningun proceso"""
+
+    def __init__(self, target, args, name):
+        self.target = target
+        self.args = args
+        self.name = name
+        self.started = False
+        self.alive = False
+        self.exitcode = None
+        self.terminated = False
+        self.joined = False
+
+    def start(self):
+        self.started = True
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def exit(self, exitcode):
+        self.alive = False
+        self.exitcode = exitcode
+
+    def terminate(self):
+        self.terminated = True
+
+    def join(self, timeout=None):
+        self.joined = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.processes = []
+
+    def Process(self, target, args, name):
+        process = FakeProcess(target, args, name)
+        self.processes.append(process)
+        return process
+
+
+@pytest.fixture
+def worker_pool_env():
+    """Reemplaza los procesos, las señales y las esperas de worker_pool.main"""
+    ctx = FakeContext()
+    handlers = {}
+    sleeps = []
+    with patch(
+        "app.workers.worker_pool.multiprocessing.get_context", return_value=ctx
+    ) as get_context, patch(
+        "app.workers.worker_pool.signal.signal",
+        lambda signum, handler: handlers.__setitem__(signum, handler),
+    ), patch(
+        "app.workers.worker_pool.create_tables"
+    ), patch(
+        "app.workers.worker_pool.settings.WORKER_PROCESSES", 2
+    ):
+        yield ctx, handlers, sleeps, get_context
+
+
+def run_main(sleeps, on_sleep):
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        on_sleep(len(sleeps))
+
+    with patch("app.workers.worker_pool.time.sleep", fake_sleep):
+        worker_pool.main()
+
+
+def test_worker_pool_starts_worker_processes(worker_pool_env):
+    """Test que verifica que se lanzan WORKER_PROCESSES procesos con spawn y se detienen con SIGTERM"""
+    ctx, handlers, sleeps, get_context = worker_pool_env
+
+    def on_sleep(calls):
+        handlers[signal.SIGTERM](signal.SIGTERM, None)
+
+    run_main(sleeps, on_sleep)
+
+    get_context.assert_called_once_with("spawn")
+    assert [process.name for process in ctx.processes] == [
+        "notification-worker-0",
+        "notification-worker-1",
+    ]
+    assert all(
+        process.target is worker_pool.run_worker_process for process in ctx.processes
+    )
+    assert [process.args for process in ctx.processes] == [(0,), (1,)]
+    assert all(process.started for process in ctx.processes)
+    assert all(process.terminated and process.joined for process in ctx.processes)
+
+
+def test_worker_pool_restarts_exited_process(worker_pool_env):
+    """Test que verifica que un proceso que termina se relanza luego de RESTART_DELAY"""
+    ctx, handlers, sleeps, _ = worker_pool_env
+
+    def on_sleep(calls):
+        if calls == 1:
+            ctx.processes[0].exit(1)
+        elif calls == 3:
+            handlers[signal.SIGINT](signal.SIGINT, None)
+
+    with patch("app.workers.worker_pool.RESTART_DELAY", 5):
+        run_main(sleeps, on_sleep)
+
+    assert sleeps == [1, 5, 1]
+    assert [process.name for process in ctx.processes] == [
+        "notification-worker-0",
+        "notification-worker-1",
+        "notification-worker-0",
+    ]
+    exited, second, restarted = ctx.processes
+    assert restarted.started and restarted.args == (0,)
+    # Al detenerse se terminan los procesos vivos, no el que ya fue reemplazado
+    assert not exited.terminated
+    assert second.terminated and restarted.terminated
+
+
+def test_worker_pool_does_not_restart_after_stop_signal(worker_pool_env):
+    """Test que verifica que despues de la señal de parada no se relanzan procesos"""
+    ctx, handlers, sleeps, _ = worker_pool_env
+
+    def on_sleep(calls):
+        handlers[signal.SIGTERM](signal.SIGTERM, None)
+        ctx.processes[0].exit(-15)
+
+    run_main(sleeps, on_sleep)
+
+    assert sleeps == [1]
+    assert len(ctx.processes) == 2
+    assert all(process.terminated and process.joined for process in ctx.processes)